@@ -6,18 +6,23 @@
 # - Adds missing check_verification() gate
 # - Reuses/extends your raid mirror, alt tools, stats, exports, etc.
 #
-# Requires: discord.py 2.x, matplotlib, python-dotenv
+# Requires: discord.py 2.x, python-dotenv (optional: orjson)
 
 import asyncio
+import atexit
 import os
 import io
 import csv
 import json
+import hashlib
 import logging
 import time
+import functools
+import weakref
 import re
-from datetime import datetime, timezone
-from typing import Dict, Optional
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set
 import sys
 import queue
 from logging.handlers import QueueHandler, QueueListener
@@ -25,9 +30,13 @@ import discord
 from discord.ext import commands
 from discord.ui import View, Button, Select
 from discord import File
-import matplotlib.pyplot as plt
 from dotenv import load_dotenv
 
+try:
+    import orjson  # optional: much faster (de)serialization for the JSON stores
+except ImportError:
+    orjson = None
+
 # =========================
 # ENV / CONFIG
 # =========================
@@ -49,6 +58,7 @@ CLASS_ROLES = [
     "Druid", "Hunter", "Mage", "Paladin", "Priest",
     "Rogue", "Shaman", "Warlock", "Warrior"
 ]
+CLASS_ROLES_SET = frozenset(CLASS_ROLES)  # O(1) membership; keep the list for ordered display
 
 # Persistent emoji/class mapping:
 #  - Keys support custom emoji **names** (preferred) and optional Unicode glyphs.
@@ -67,6 +77,8 @@ CLASS_EMOJIS = {
     # "🏹": "Hunter",
     # "🛡️": "Warrior",
 }
+# Custom-emoji keys (names) resolved against guild emojis when prompting; computed once.
+_CLASS_EMOJI_NAMES = tuple(key for key in CLASS_EMOJIS if key.isalpha())
 
 # --- Raid Mirror Config ---
 SOURCE_CHANNELS: Dict[str, str] = {
@@ -81,11 +93,19 @@ STATE_DB = "raid_mirror_state.json"
 # =========================
 # LOGGING
 # =========================
-logging.basicConfig(
-    filename='guild_bot.log',
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s'
-)
+# Root logger -> queue; a listener thread does the formatting + file writes,
+# so logging.* calls from handlers never touch the disk on the event loop.
+_log_queue = queue.SimpleQueue()
+_log_file_handler = logging.FileHandler('guild_bot.log')
+_log_file_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
+# QueueHandler.prepare() pre-formats each record; keep that to the bare message so the
+# listener's file formatter is the only one applied (basicConfig would set BASIC_FORMAT).
+_log_queue_handler = QueueHandler(_log_queue)
+_log_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=logging.INFO, handlers=[_log_queue_handler])
+_log_listener = QueueListener(_log_queue, _log_file_handler, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)  # drains the queue on shutdown
 
 # --- Structured audit logging (file + console) ---
 AUDIT_LOG_FILE = "guild_audit.log"
@@ -97,6 +117,9 @@ def _ensure_audit_logger():
         return logger  # already configured
 
     logger.setLevel(logging.INFO)
+    # Audit records go to guild_audit.log only; without this they also bubble up to
+    # the root handler and get duplicated into guild_bot.log.
+    logger.propagate = False
 
     # File handler (UTF-8, safe for emoji)
     fh = logging.FileHandler(AUDIT_LOG_FILE, encoding="utf-8")
@@ -106,15 +129,7 @@ def _ensure_audit_logger():
         datefmt="%Y-%m-%d %H:%M:%S"
     ))
 
-    # Non-blocking queue path
-    q = queue.SimpleQueue()
-    qh = QueueHandler(q)
-    logger.addHandler(qh)
-
-    # Listener writes records to the file handler on a separate thread
-    _audit_listener = QueueListener(q, fh, respect_handler_level=True)
-    _audit_listener.daemon = True
-    _audit_listener.start()
+    handlers = [fh]
 
     # Optional console mirror ONLY if the console is UTF-8 (e.g., Windows Terminal with UTF-8)
     try:
@@ -125,11 +140,19 @@ def _ensure_audit_logger():
                 fmt="%(asctime)s | %(levelname)s | %(message)s",
                 datefmt="%H:%M:%S"
             ))
-            logger.addHandler(ch)
+            handlers.append(ch)
     except Exception:
         # If the console isn’t UTF-8, just skip adding a console handler
         pass
 
+    # Non-blocking queue path: the logger only enqueues; the listener thread
+    # feeds both the file and the console handler.
+    q = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(q))
+    _audit_listener = QueueListener(q, *handlers, respect_handler_level=True)
+    _audit_listener.start()
+    atexit.register(_audit_listener.stop)
+
     return logger
 
 _audit = _ensure_audit_logger()
@@ -150,8 +173,12 @@ def audit(event: str, member: discord.abc.User | None = None, **fields):
                 "user_name": getattr(member, "name", None),
                 "display": getattr(member, "display_name", None),
             })
-        # compact JSON on one line for easy grep
-        _audit.info(json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+        # compact JSON on one line for easy grep (orjson emits the same compact, non-escaped form)
+        if orjson is not None:
+            line = orjson.dumps(payload).decode("utf-8")
+        else:
+            line = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        _audit.info(line)
     except Exception as e:
         logging.error(f"[AUDIT] Failed to write audit log for {event}: {e}")
 
@@ -167,44 +194,161 @@ bot = commands.Bot(command_prefix="!", intents=intents)
 # =========================
 # PERSISTENCE HELPERS
 # =========================
+def _json_loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+# Compact output: the stores are machine-read, and indenting roughly doubles encode time and size.
+def _json_dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# Digest of the bytes last read from / written to each path; lets no-op saves skip the write.
+_last_digest: Dict[str, bytes] = {}
+
+def _digest(payload: bytes) -> bytes:
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
 def _safe_load_json(path: str, default):
     try:
-        if not os.path.exists(path):
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(default, f)
-            return default
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            raw = f.read()
+        _last_digest[path] = _digest(raw)
+        return _json_loads(raw)
+    except FileNotFoundError:
+        return default  # created by the first flush that has something to write
     except Exception as e:
         logging.error(f"[ERROR] load {path}: {e}")
         return default
 
-def _safe_save_json(path: str, data):
+def _safe_write_bytes(path: str, payload: bytes) -> bool:
+    """Persist payload to path; returns False if the write failed (the caller may retry)."""
+    digest = _digest(payload)
+    if _last_digest.get(path) == digest:
+        return True  # unchanged since last read/write
+    # Write a sibling temp file and swap it in, so a crash mid-write never
+    # leaves a truncated store behind (which would load as {} on next boot).
+    tmp = path + ".tmp"
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        with open(tmp, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        _last_digest[path] = digest
+        return True
     except Exception as e:
         logging.error(f"[ERROR] save {path}: {e}")
+        return False
+
+def _safe_save_json(path: str, data) -> bool:
+    return _safe_write_bytes(path, _json_dumps(data))
 
 verified_users: Dict[str, dict] = _safe_load_json(VERIFIED_DB, {})
-# Normalize any legacy bool values
-for uid, val in list(verified_users.items()):
-    if isinstance(val, bool):
-        verified_users[uid] = {"verified": val}
+# Normalize any legacy bool values (one-shot: persisted so later boots skip the rebuild)
+if any(isinstance(val, bool) for val in verified_users.values()):
+    verified_users = {
+        uid: ({"verified": val} if isinstance(val, bool) else val)
+        for uid, val in verified_users.items()
+    }
+    _safe_save_json(VERIFIED_DB, verified_users)
 
 alts_data: Dict[str, dict] = _safe_load_json(ALTS_DB, {})
 
-def save_verified(data=None):
-    _safe_save_json(VERIFIED_DB, verified_users if data is None else data)
+# Reverse index alt name -> owner uids; rebuilt at load, maintained on every alt mutation.
+# A set per alt: the same alt name may be listed under more than one user.
+alt_index: Dict[str, Set[str]] = {}
+
+def _index_alts(uid: str, alts) -> None:
+    for alt in alts:
+        alt_index.setdefault(alt, set()).add(uid)
+
+def _unindex_alts(uid: str, alts) -> None:
+    for alt in alts:
+        owners = alt_index.get(alt)
+        if owners is not None:
+            owners.discard(uid)
+            if not owners:
+                del alt_index[alt]
+
+for _uid, _rec in alts_data.items():
+    _index_alts(_uid, _rec.get("alts") or {})
+
+def save_verified(data=None) -> bool:
+    return _safe_save_json(VERIFIED_DB, verified_users if data is None else data)
+
+def save_alts(data=None) -> bool:
+    return _safe_save_json(ALTS_DB, alts_data if data is None else data)
+
+# --- Write-behind: mutations only mark a store dirty; _flush_loop() wakes on the
+# --- first mark, waits FLUSH_INTERVAL_SECONDS to coalesce the burst, then writes.
+FLUSH_INTERVAL_SECONDS = 2.0
+_dirty_verified = asyncio.Event()
+_dirty_alts = asyncio.Event()
+_dirty_state = asyncio.Event()
+_flush_wanted = asyncio.Event()  # any store dirty; lets the flusher sleep while idle
+_pending_state: dict = {}  # latest raid-mirror state handed to _save_state()
+
+def mark_verified_dirty():
+    _dirty_verified.set()
+    _flush_wanted.set()
+
+def mark_alts_dirty():
+    _dirty_alts.set()
+    _flush_wanted.set()
+
+def set_user_flag(uid: str, flag: str) -> dict:
+    """Set verified_users[uid][flag] = True; only dirties the store when it actually changes."""
+    rec = verified_users.get(uid)
+    if rec is None:
+        rec = verified_users[uid] = {}
+    if not rec.get(flag):
+        rec[flag] = True
+        mark_verified_dirty()
+    return rec
+
+async def _flush_dirty():
+    loop = asyncio.get_running_loop()
+    for flag, path, data in ((_dirty_verified, VERIFIED_DB, verified_users),
+                             (_dirty_alts, ALTS_DB, alts_data),
+                             (_dirty_state, STATE_DB, _pending_state)):
+        if not flag.is_set():
+            continue
+        flag.clear()
+        # Encode on the loop (consistent snapshot), write to disk in a worker thread.
+        payload = _json_dumps(data)
+        if not await loop.run_in_executor(None, _safe_write_bytes, path, payload):
+            # Write failed (disk full, permissions...): stay dirty so the next pass
+            # (FLUSH_INTERVAL_SECONDS later) and the atexit flush retry it.
+            flag.set()
+            _flush_wanted.set()
+
+async def _flush_loop():
+    while True:
+        await _flush_wanted.wait()
+        await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+        _flush_wanted.clear()  # marks made during the write below re-arm it
+        try:
+            await _flush_dirty()
+        except Exception as e:
+            logging.error(f"[ERROR] flush loop: {e}")
 
-def save_alts(data=None):
-    _safe_save_json(ALTS_DB, alts_data if data is None else data)
+@atexit.register
+def _flush_on_exit():
+    if _dirty_verified.is_set():
+        save_verified()
+    if _dirty_alts.is_set():
+        save_alts()
+    if _dirty_state.is_set():
+        _safe_save_json(STATE_DB, _pending_state)
 
 # Minimal persistent mirror state
 def _load_state() -> dict:
     try:
-        with open(STATE_DB, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(STATE_DB, "rb") as f:
+            data = _json_loads(f.read())
         if "week_key" in data and "mirrors" in data:
             return data
     except Exception:
@@ -212,76 +356,254 @@ def _load_state() -> dict:
     return {"week_key": None, "mirrors": {}}
 
 def _save_state(state: dict) -> None:
-    _safe_save_json(STATE_DB, state)
+    # Same write-behind path as verified_users/alts_data (the cog may swap in a new dict).
+    global _pending_state
+    _pending_state = state
+    _dirty_state.set()
+    _flush_wanted.set()
+
+# CSV helpers (blocking; call via asyncio.to_thread from commands)
+def _read_csv_rows(path: str) -> list:
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+def _write_csv_rows(path: str, header: list, rows: list) -> None:
+    # Build the whole file in memory, then hand it to the OS in one write().
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    writer.writerows(rows)
+    with open(path, "w", newline="", buffering=1 << 20) as f:
+        f.write(buf.getvalue())
 
 # =========================
 # UTILITIES
 # =========================
+# Common case (plain ASCII names) in one C-level match; accented names
+# (WoW allows them) still fall back to the Unicode-aware isalpha().
+_ASCII_NICK = re.compile(r"[A-Za-z]{3,}").fullmatch
+
 def is_valid_wow_nickname(nickname: str) -> bool:
-    return nickname.isalpha() and len(nickname) > 2
+    return _ASCII_NICK(nickname) is not None or (len(nickname) > 2 and nickname.isalpha())
+
+# Hook for a stricter policy; until one exists it is the same function (no extra call frame).
+nickname_meets_policy = is_valid_wow_nickname
+
+def split_message(text: str, limit: int = 1990) -> list:
+    """Split text into as few chunks <= limit as possible, preferring newline boundaries."""
+    chunks, cur, cur_len = [], [], 0
+    for line in text.split("\n"):
+        while len(line) > limit:  # a single oversized line gets hard-split
+            if cur:
+                chunks.append("\n".join(cur))
+                cur, cur_len = [], 0
+            chunks.append(line[:limit])
+            line = line[limit:]
+        if cur and cur_len + 1 + len(line) > limit:
+            chunks.append("\n".join(cur))
+            cur, cur_len = [], 0
+        cur_len += len(line) + (1 if cur else 0)
+        cur.append(line)
+    if cur:
+        chunks.append("\n".join(cur))
+    return chunks
+
+# (guild_id, channel name) -> channel id; misses are not cached so a newly
+# created channel is picked up on the next lookup. Only ids are kept: the object
+# is resolved through guild.get_channel() (a dict hit), so a guild re-sync that
+# rebuilds the cache can never hand back a stale TextChannel.
+_channel_cache: Dict[tuple, int] = {}
+
+def get_text_channel(guild: discord.Guild, name: str) -> Optional[discord.TextChannel]:
+    key = (guild.id, name)
+    cid = _channel_cache.get(key)
+    ch = guild.get_channel(cid) if cid is not None else None
+    if not isinstance(ch, discord.TextChannel) or ch.name != name:
+        ch = discord.utils.get(guild.text_channels, name=name)
+        if ch is None:
+            _channel_cache.pop(key, None)
+            return None
+        _channel_cache[key] = ch.id
+    return ch
 
-def nickname_meets_policy(nick: str) -> bool:
-    return is_valid_wow_nickname(nick)
+@bot.event
+async def on_guild_channel_create(channel):
+    _normalized_channels.pop(channel.guild.id, None)
+    _source_channel_keys.pop(channel.guild.id, None)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    _channel_cache.pop((channel.guild.id, channel.name), None)
+    _normalized_channels.pop(channel.guild.id, None)
+    _source_channel_keys.pop(channel.guild.id, None)
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    _channel_cache.pop((before.guild.id, before.name), None)
+    if before.name != after.name or before.position != after.position:
+        _normalized_channels.pop(before.guild.id, None)
+        _source_channel_keys.pop(before.guild.id, None)
+
+# (guild_id, role name) -> role id; same policy as _channel_cache, resolved via guild.get_role().
+_role_cache: Dict[tuple, int] = {}
+
+def get_guild_role(guild: discord.Guild, name: str) -> Optional[discord.Role]:
+    key = (guild.id, name)
+    rid = _role_cache.get(key)
+    role = guild.get_role(rid) if rid is not None else None
+    if role is None or role.name != name:
+        role = discord.utils.get(guild.roles, name=name)
+        if role is None:
+            _role_cache.pop(key, None)
+            return None
+        _role_cache[key] = role.id
+    return role
+
+# guild_id -> ids of the guild's class roles; dropped on any role create/delete/rename.
+_class_role_id_cache: Dict[int, frozenset] = {}
+
+def class_role_ids(guild: discord.Guild) -> frozenset:
+    ids = _class_role_id_cache.get(guild.id)
+    if ids is None:
+        ids = _class_role_id_cache[guild.id] = frozenset(_class_role_names_by_id(guild))
+    return ids
+
+def has_class_role(member: discord.Member) -> bool:
+    # member._roles is the raw id list; no Role objects are built
+    return not class_role_ids(member.guild).isdisjoint(member._roles)
+
+def has_role(member: discord.Member, role: Optional[discord.Role]) -> bool:
+    # Member.get_role() bisects the raw id list; `role in member.roles` builds and sorts Role objects
+    return role is not None and member.get_role(role.id) is not None
+
+@bot.event
+async def on_guild_role_create(role):
+    _class_role_id_cache.pop(role.guild.id, None)
+
+@bot.event
+async def on_guild_role_delete(role):
+    _role_cache.pop((role.guild.id, role.name), None)
+    _class_role_id_cache.pop(role.guild.id, None)
+
+@bot.event
+async def on_guild_role_update(before, after):
+    _role_cache.pop((before.guild.id, before.name), None)
+    if before.name != after.name:
+        _class_role_id_cache.pop(before.guild.id, None)
+
+# guild_id -> class emojis present in that guild, in CLASS_EMOJIS order.
+# add_reaction only needs name:id, so the objects are safe to hold until the next emoji update.
+_class_emoji_cache: Dict[int, list] = {}
+
+def get_class_emojis(guild: discord.Guild) -> list:
+    emojis = _class_emoji_cache.get(guild.id)
+    if emojis is None:
+        by_name = {e.name: e for e in guild.emojis}
+        emojis = [by_name[key] for key in _CLASS_EMOJI_NAMES if key in by_name]
+        _class_emoji_cache[guild.id] = emojis
+    return emojis
+
+@bot.event
+async def on_guild_emojis_update(guild, before, after):
+    _class_emoji_cache.pop(guild.id, None)
+
+def _class_role_names_by_id(guild: discord.Guild) -> Dict[int, str]:
+    """Map role id -> class name for the guild's class roles (build once per command)."""
+    return {r.id: r.name for r in guild.roles if r.name in CLASS_ROLES_SET}
+
+def _member_class_name(member: discord.Member, class_names_by_id: Dict[int, str]) -> Optional[str]:
+    # member._roles holds raw role ids, so no Role objects are materialized per member
+    for rid in member._roles:
+        name = class_names_by_id.get(rid)
+        if name:
+            return name
+    return None
 
 def _iso_week_key(now: Optional[datetime] = None) -> str:
     now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
     year, week, _ = now.isocalendar()
     return f"{year}-W{week:02d}"
 
+# Current week key, valid until the next ISO week starts (Monday 00:00 UTC).
+_week_cache = {"key": None, "until": 0.0}
+
+def _current_week_key() -> str:
+    ts = time.time()
+    if ts < _week_cache["until"]:
+        return _week_cache["key"]
+    now = datetime.now(timezone.utc)
+    monday = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=now.weekday())
+    _week_cache.update(key=_iso_week_key(now), until=(monday + timedelta(days=7)).timestamp())
+    return _week_cache["key"]
+
+_NORM_RE = re.compile(r"[\s_]+")
+
+@functools.lru_cache(maxsize=1024)
 def _normalize(name: str) -> str:
-    return re.sub(r"[\s_]+", "-", name.strip().lower())
+    return _NORM_RE.sub("-", name.strip().lower())
+
+# guild_id -> {normalized channel name: channel id}; built lazily, dropped on channel events.
+_normalized_channels: Dict[int, Dict[str, int]] = {}
 
 def _find_channel_by_name(guild: discord.Guild, name: str) -> Optional[discord.TextChannel]:
-    want = _normalize(name)
-    for ch in guild.text_channels:
-        if _normalize(ch.name) == want:
-            return ch
-    return None
+    index = _normalized_channels.get(guild.id)
+    if index is None:
+        index = {}
+        for ch in guild.text_channels:
+            index.setdefault(_normalize(ch.name), ch.id)  # first match wins, as before
+        _normalized_channels[guild.id] = index
+    cid = index.get(_normalize(name))
+    ch = guild.get_channel(cid) if cid is not None else None
+    return ch if isinstance(ch, discord.TextChannel) else None
 
 def _clone_embed(src: discord.Embed) -> discord.Embed:
-    dst = discord.Embed(
-        title=src.title, description=src.description, color=src.color,
-        url=src.url, timestamp=src.timestamp,
-    )
-    if src.author:
-        dst.set_author(
-            name=src.author.name or discord.Embed.Empty,
-            url=getattr(src.author, "url", None) or discord.Embed.Empty,
-            icon_url=getattr(src.author, "icon_url", None) or discord.Embed.Empty,
-        )
-    if src.footer:
-        dst.set_footer(
-            text=src.footer.text or discord.Embed.Empty,
-            icon_url=getattr(src.footer, "icon_url", None) or discord.Embed.Empty,
-        )
-    if src.thumbnail and src.thumbnail.url:
-        dst.set_thumbnail(url=src.thumbnail.url)
-    if src.image and src.image.url:
-        dst.set_image(url=src.image.url)
-    for f in src.fields:
-        dst.add_field(name=f.name, value=f.value, inline=f.inline)
-    return dst
+    # Round-trip through the API payload: one library pass copies every optional part
+    return discord.Embed.from_dict(src.to_dict())
 
 # =========================
 # RAID MIRROR COG
 # =========================
+# SOURCE_CHANNELS is static: normalize its keys once.
+_SOURCE_NORMALIZED: Dict[str, str] = {_normalize(k): v for k, v in SOURCE_CHANNELS.items()}
+
+# guild_id -> {source channel id: raidkey}; same lifetime as _normalized_channels.
+_source_channel_keys: Dict[int, Dict[int, str]] = {}
+
+def _source_keys(guild: discord.Guild) -> Dict[int, str]:
+    keys = _source_channel_keys.get(guild.id)
+    if keys is None:
+        keys = {}
+        for ch in guild.text_channels:
+            raidkey = _SOURCE_NORMALIZED.get(_normalize(ch.name))
+            if raidkey:
+                keys[ch.id] = raidkey
+        _source_channel_keys[guild.id] = keys
+    return keys
+
 def _raidkey_for_message(message: discord.Message) -> Optional[str]:
-    if not isinstance(message.channel, discord.TextChannel):
+    if message.guild is None:
         return None
-    raidkey = SOURCE_CHANNELS.get(_normalize(message.channel.name))
+    # Most messages are outside the sign-up channels: one dict miss, no string work
+    raidkey = _source_keys(message.guild).get(message.channel.id)
     if not raidkey:
         return None
     if not message.embeds:
         return None
     return raidkey
 
+async def _latest_raid_post(src: discord.TextChannel, raidkey: str, limit: int) -> Optional[discord.Message]:
+    async for m in src.history(limit=limit, oldest_first=False):
+        if m.embeds and _raidkey_for_message(m) == raidkey:
+            return m
+    return None
+
 class CurrentWeekRaidMirror(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.state = _load_state()
 
     async def _ensure_week(self, guild: discord.Guild) -> None:
-        wk_now = _iso_week_key()
+        wk_now = _current_week_key()
         if self.state.get("week_key") == wk_now:
             return
         dest = _find_channel_by_name(guild, DESTINATION_CHANNEL)
@@ -303,17 +625,19 @@ class CurrentWeekRaidMirror(commands.Cog):
     async def refresh_all_mirrors(self, guild: discord.Guild, per_channel_scan: int = 50) -> None:
         try:
             await self._ensure_week(guild)
+            sources = []
             for src_name, raidkey in SOURCE_CHANNELS.items():
                 src = _find_channel_by_name(guild, src_name)
-                if not isinstance(src, discord.TextChannel):
-                    continue
-                found = None
-                async for m in src.history(limit=per_channel_scan, oldest_first=False):
-                    if m.embeds and _raidkey_for_message(m) == raidkey:
-                        found = m
-                        break
-                if found:
-                    await self._post_or_replace(guild, raidkey, found)
+                if isinstance(src, discord.TextChannel):
+                    sources.append((src, raidkey))
+            # Scan all source histories concurrently; post serially to keep mirror order stable
+            found = await asyncio.gather(
+                *(_latest_raid_post(src, raidkey, per_channel_scan) for src, raidkey in sources),
+                return_exceptions=True,
+            )
+            for (_, raidkey), msg in zip(sources, found):
+                if isinstance(msg, discord.Message):
+                    await self._post_or_replace(guild, raidkey, msg)
         except Exception:
             pass
 
@@ -395,39 +719,67 @@ async def register_raid_mirror(bot: commands.Bot) -> None:
 # =========================
 # ONBOARDING / VERIFICATION UI
 # =========================
+# Static onboarding embed, built once at import. It is never mutated after this,
+# so every post can share the same instance (only the mention content differs).
+_ONBOARDING_EMBED = discord.Embed(
+    title="Welcome to Vindicated!",
+    description=(
+        "Choose your track below:\n"
+        "• **I’m joining the guild** → you’ll become **Guild Member** after onboarding.\n"
+        "• **I’m just visiting** → you’ll become **Visitor** after onboarding.\n\n"
+        "Then complete these steps:\n"
+        "1) Update your **server nickname** to your main WoW character\n"
+        "2) **Accept the rules**\n"
+        "3) **Confirm nickname**\n"
+        "4) **Choose your class**"
+    ),
+    color=discord.Color.blue()
+)
+
 async def send_onboarding_embed(member: discord.Member):
     """
     Posts the onboarding message with a track choice (member vs visitor)
     and the persistent VerificationView (track buttons + verify buttons + class select).
     """
+    await _send_onboarding(member.guild, [member])
+
+async def _send_onboarding(guild: discord.Guild, members: list):
+    """One onboarding post mentioning every member in `members` (the view is stateless)."""
     try:
-        onboarding_channel = discord.utils.get(member.guild.text_channels, name=ONBOARDING_CHANNEL)
+        onboarding_channel = get_text_channel(guild, ONBOARDING_CHANNEL)
         if not onboarding_channel:
             return
 
-        embed = discord.Embed(
-            title="Welcome to Vindicated!",
-            description=(
-                "Choose your track below:\n"
-                "• **I’m joining the guild** → you’ll become **Guild Member** after onboarding.\n"
-                "• **I’m just visiting** → you’ll become **Visitor** after onboarding.\n\n"
-                "Then complete these steps:\n"
-                "1) Update your **server nickname** to your main WoW character\n"
-                "2) **Accept the rules**\n"
-                "3) **Confirm nickname**\n"
-                "4) **Choose your class**"
-            ),
-            color=discord.Color.blue()
-        )
-
-        await onboarding_channel.send(
-            content=f"{member.mention}",
-            embed=embed,
-            view=VerificationView()  # persistent, includes track + verify + class select
-        )
+        for i in range(0, len(members), ONBOARDING_MENTIONS_PER_POST):
+            await onboarding_channel.send(
+                content=" ".join(m.mention for m in members[i:i + ONBOARDING_MENTIONS_PER_POST]),
+                embed=_ONBOARDING_EMBED,
+                view=VerificationView()  # persistent, includes track + verify + class select
+            )
     except Exception as e:
         logging.error(f"[ERROR] send_onboarding_embed: {e}")
 
+# --- Join bursts: members joining within ONBOARDING_BATCH_SECONDS share one post.
+ONBOARDING_BATCH_SECONDS = 2.0
+ONBOARDING_MENTIONS_PER_POST = 50  # stays well under the 2000-char content limit
+_pending_onboarding: Dict[int, list] = defaultdict(list)
+_onboarding_tasks: Dict[int, asyncio.Task] = {}
+
+def queue_onboarding_embed(member: discord.Member):
+    gid = member.guild.id
+    _pending_onboarding[gid].append(member)
+    if gid not in _onboarding_tasks:
+        _onboarding_tasks[gid] = asyncio.create_task(_flush_onboarding(member.guild))
+
+async def _flush_onboarding(guild: discord.Guild):
+    try:
+        await asyncio.sleep(ONBOARDING_BATCH_SECONDS)
+    finally:
+        _onboarding_tasks.pop(guild.id, None)
+        batch = _pending_onboarding.pop(guild.id, [])
+    if batch:
+        await _send_onboarding(guild, batch)
+
 
 # ---------- Persistent Verification View (stateless) ----------
 # Buttons use fixed custom_id values; they do not capture 'member'.
@@ -462,21 +814,16 @@ class VerificationView(View):
             except Exception:
                 return True
 
-    @staticmethod
-    def _audit(event: str, member: discord.abc.User | None, **fields):
-        fn = globals().get("audit", None)
-        if callable(fn):
-            try:
-                fn(event, member, **fields)
-            except Exception:
-                pass
+    # audit() never raises (it logs its own failures), so bind it directly
+    _audit = staticmethod(audit)
 
     @staticmethod
-    def _set_track(uid: str, track: str):
+    def _set_track(uid: str, track: str) -> dict:
         rec = verified_users.get(uid, {}) or {}
         rec["track"] = track if track in VALID_TRACKS else DEFAULT_TRACK
         verified_users[uid] = rec
-        save_verified()
+        mark_verified_dirty()
+        return rec
 
     @staticmethod
     def _is_new_user(member: discord.Member) -> bool:
@@ -509,14 +856,14 @@ class VerificationView(View):
                 return
 
             uid = str(user.id)
-            self._set_track(uid, "member")
+            rec = self._set_track(uid, "member")
             await interaction.response.send_message(
                 "Track set: **Guild Member**. Complete the steps to be promoted to **Guild Member**.",
                 ephemeral=True
             )
             self._audit("track_selected", user, track="member")
             await log_verification_event(interaction.guild, user, "Selected Track", {"track": "member"})
-            await check_verification(user)
+            await check_verification(user, rec)
         except Exception as e:
             logging.error(f"[ERROR] choose_member_track: {e}")
             self._audit("track_select_error", interaction.user, error=str(e))
@@ -540,14 +887,14 @@ class VerificationView(View):
                 return
 
             uid = str(user.id)
-            self._set_track(uid, "visitor")
+            rec = self._set_track(uid, "visitor")
             await interaction.response.send_message(
                 "Track set: **Visitor**. Complete the steps to be promoted to **Visitor**.",
                 ephemeral=True
             )
             self._audit("track_selected", user, track="visitor")
             await log_verification_event(interaction.guild, user, "Selected Track", {"track": "visitor"})
-            await check_verification(user)
+            await check_verification(user, rec)
         except Exception as e:
             logging.error(f"[ERROR] choose_visitor_track: {e}")
             self._audit("track_select_error", interaction.user, error=str(e))
@@ -571,15 +918,13 @@ class VerificationView(View):
                 self._audit("rules_click_already_verified", user)
                 return
 
-            rec["rules_accepted"] = True
-            verified_users[uid] = rec
-            save_verified()
+            rec = set_user_flag(uid, "rules_accepted")
 
             await interaction.response.send_message("✅ Rules accepted!", ephemeral=True)
             self._audit("rules_accepted", user)
 
             await log_verification_event(interaction.guild, user, "Accepted Rules", rec)
-            await check_verification(user)
+            await check_verification(user, rec)
         except Exception as e:
             logging.error(f"[ERROR] accept_rules: {e}")
             self._audit("rules_accept_error", interaction.user, error=str(e))
@@ -614,20 +959,76 @@ class VerificationView(View):
             #     self._audit("nickname_invalid", user, display=display)
             #     return
 
-            rec["nickname_confirmed"] = True
-            verified_users[uid] = rec
-            save_verified()
+            rec = set_user_flag(uid, "nickname_confirmed")
 
             await interaction.response.send_message("🏷 Nickname confirmed!", ephemeral=True)
             self._audit("nickname_confirmed", user, display=display)
 
             await log_verification_event(interaction.guild, user, "Confirmed Nickname", rec)
-            await check_verification(user)
+            await check_verification(user, rec)
         except Exception as e:
             logging.error(f"[ERROR] confirm_nickname: {e}")
             self._audit("nickname_confirm_error", interaction.user, error=str(e))
 
 
+# ---------- Per-user serialization ----------
+# Entries vanish once no coroutine holds the lock, so the map never needs pruning.
+_user_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def user_lock(user_id: int) -> asyncio.Lock:
+    lock = _user_locks.get(user_id)
+    if lock is None:
+        lock = _user_locks[user_id] = asyncio.Lock()
+    return lock
+
+
+# ---------- Role edits ----------
+async def apply_role_changes(member: discord.Member, add=(), remove=(), reason: str = None) -> bool:
+    """
+    Add/remove roles with per-role requests (add_roles/remove_roles), never a full
+    role-list rewrite: `member` may be a stale snapshot (interaction.user, payload.member),
+    and replacing the whole list from it would undo roles granted since it was taken.
+    The removal is attempted even if the add fails; the first error is re-raised afterwards.
+    Returns True if a request was made.
+    """
+    current = member.roles
+    add = [r for r in add if r is not None and r not in current]
+    remove = [r for r in remove if r is not None and r in current]
+    error = None
+    if add:
+        try:
+            await member.add_roles(*add, reason=reason)
+        except Exception as e:
+            error = e
+    if remove:
+        try:
+            await member.remove_roles(*remove, reason=reason)
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
+    return bool(add or remove)
+
+
+# ---------- Shared class assignment (select + reactions) ----------
+async def _assign_class_role(member: discord.Member, class_name: str, source: str) -> Optional[list]:
+    """
+    Leave `member` with exactly one class role and persist class_assigned.
+    Returns the names of class roles removed, or None if the class role doesn't exist.
+    """
+    async with user_lock(member.id):  # select + reaction for the same user must not interleave
+        role = get_guild_role(member.guild, class_name)
+        if role is None:
+            return None
+
+        # One scan of the member's roles; Discord still takes one request per role added/removed
+        to_remove = [r for r in member.roles if r.name in CLASS_ROLES_SET and r.name != class_name]
+        await apply_role_changes(member, add=[role], remove=to_remove, reason=f"class:{source}")
+
+        set_user_flag(str(member.id), "class_assigned")
+        return [r.name for r in to_remove]
+
+
 # ---------- Persistent Class Select (stateless) ----------
 class ClassRoleSelect(Select):
     def __init__(self):
@@ -645,25 +1046,11 @@ class ClassRoleSelect(Select):
             guild = interaction.guild
             selected_class = self.values[0]
 
-            # Remove any existing class roles
-            for class_name in CLASS_ROLES:
-                r = discord.utils.get(guild.roles, name=class_name)
-                if r and r in user.roles:
-                    await user.remove_roles(r)
-
-            role = discord.utils.get(guild.roles, name=selected_class)
-            if role:
-                await user.add_roles(role)
-                # Persist 'class_assigned'
-                uid = str(user.id)
-                rec = verified_users.get(uid, {})
-                rec["class_assigned"] = True
-                verified_users[uid] = rec
-                save_verified()
-
+            removed = await _assign_class_role(user, selected_class, "select")
+            if removed is not None:
                 await interaction.response.send_message(f"✅ {selected_class} role assigned!", ephemeral=True)
                 # Log + advance verification
-                onboarding_channel = discord.utils.get(guild.text_channels, name=ONBOARDING_CHANNEL)
+                onboarding_channel = get_text_channel(guild, ONBOARDING_CHANNEL)
                 if onboarding_channel:
                     await onboarding_channel.send(f"✅ {user.mention} assigned class role: **{selected_class}**")
                 await check_verification(user)
@@ -677,14 +1064,41 @@ class ClassRoleSelect(Select):
 
 
 # ---------- Verification logging ----------
+# Clicks by the same user within VERIFICATION_LOG_SECONDS are coalesced into one embed
+# (actions joined, latest flags) so onboarding doesn't cost one channel post per button.
+VERIFICATION_LOG_SECONDS = 3.0
+_pending_verification_logs: Dict[int, tuple] = {}
+_verification_log_tasks: Dict[int, asyncio.Task] = {}
+
 async def log_verification_event(guild: discord.Guild, member: discord.Member, action: str, flags: dict):
+    pending = _pending_verification_logs.get(member.id)
+    if pending:
+        _, actions, merged = pending
+        actions.append(action)
+        merged.update(flags)
+    else:
+        _pending_verification_logs[member.id] = (guild, [action], dict(flags))
+    if member.id not in _verification_log_tasks:
+        _verification_log_tasks[member.id] = asyncio.create_task(_flush_verification_log(member))
+
+async def _flush_verification_log(member: discord.Member):
+    try:
+        await asyncio.sleep(VERIFICATION_LOG_SECONDS)
+    finally:
+        _verification_log_tasks.pop(member.id, None)
+        pending = _pending_verification_logs.pop(member.id, None)
+    if pending:
+        guild, actions, flags = pending
+        await _send_verification_log(guild, member, " → ".join(actions), flags)
+
+async def _send_verification_log(guild: discord.Guild, member: discord.Member, action: str, flags: dict):
     try:
-        onboarding_channel = discord.utils.get(guild.text_channels, name=ONBOARDING_CHANNEL)
+        onboarding_channel = get_text_channel(guild, ONBOARDING_CHANNEL)
         if onboarding_channel:
             embed = discord.Embed(
                 title="Verification Log",
                 color=discord.Color.gold(),
-                timestamp=datetime.utcnow()
+                timestamp=discord.utils.utcnow()
             )
             embed.add_field(name="User", value=member.mention, inline=False)
             embed.add_field(name="Action", value=action, inline=False)
@@ -698,7 +1112,15 @@ async def log_verification_event(guild: discord.Guild, member: discord.Member, a
 # =========================
 # FINAL GATE (track-aware)
 # =========================
-async def check_verification(member: discord.Member) -> None:
+def gate_flags(member: discord.Member, rec: dict) -> tuple:
+    """(rules_ok, nick_ok, class_ok) for `member`; class counts if flagged OR a class role is held."""
+    return (
+        bool(rec.get("rules_accepted")),
+        bool(rec.get("nickname_confirmed")),
+        bool(rec.get("class_assigned")) or has_class_role(member),
+    )
+
+async def check_verification(member: discord.Member, rec: Optional[dict] = None) -> None:
     """
     Promote a user after onboarding based on selected track:
       track == "member"  -> add Guild Member
@@ -712,29 +1134,31 @@ async def check_verification(member: discord.Member) -> None:
     UPDATE: Only performs promotion/track-based role changes for *newcomers* or
     users who are not yet verified. This prevents verified users from flipping
     between Visitor/Guild Member by pressing buttons later.
+
+    Callers that already hold the member's live verified_users record pass it as `rec`.
     """
     try:
-        uid = str(member.id)
-        rec = verified_users.get(uid, {}) or {}
+        # Read-check-promote spans several awaits; concurrent clicks would double-promote
+        async with user_lock(member.id):
+            uid = str(member.id)
+            if rec is None:
+                rec = verified_users.get(uid, {}) or {}
 
-        rules_ok = bool(rec.get("rules_accepted"))
-        nick_ok  = bool(rec.get("nickname_confirmed"))
-        class_ok = bool(rec.get("class_assigned")) or any(r.name in CLASS_ROLES for r in member.roles)
+            rules_ok, nick_ok, class_ok = gate_flags(member, rec)
 
-        track = rec.get("track", DEFAULT_TRACK)
-        if track not in VALID_TRACKS:
-            track = DEFAULT_TRACK
+            track = rec.get("track", DEFAULT_TRACK)
+            if track not in VALID_TRACKS:
+                track = DEFAULT_TRACK
 
-        guild = member.guild
-        newcomer_role = discord.utils.get(guild.roles, name=NEWCOMER_ROLE)
-        member_role   = discord.utils.get(guild.roles, name=MEMBER_ROLE)
-        visitor_role  = discord.utils.get(guild.roles, name=VISITOR_ROLE)
+            guild = member.guild
+            newcomer_role = get_guild_role(guild, NEWCOMER_ROLE)
+            member_role   = get_guild_role(guild, MEMBER_ROLE)
+            visitor_role  = get_guild_role(guild, VISITOR_ROLE)
 
-        is_newcomer = (newcomer_role in member.roles) if newcomer_role else False
-        is_already_verified = bool(rec.get("verified"))
-        allow_promotion = is_newcomer or not is_already_verified
+            is_newcomer = has_role(member, newcomer_role)
+            is_already_verified = bool(rec.get("verified"))
+            allow_promotion = is_newcomer or not is_already_verified
 
-        try:
             audit(
                 "onboard_gate_check",
                 member,
@@ -746,63 +1170,65 @@ async def check_verification(member: discord.Member) -> None:
                 allow_promotion=allow_promotion,
                 roles=[r.name for r in member.roles]
             )
-        except Exception:
-            pass
 
-        # Not ready or not allowed to change anything → stop.
-        if not (rules_ok and nick_ok and class_ok):
-            return
-        if not allow_promotion:
-            return
+            # Not ready or not allowed to change anything → stop.
+            if not (rules_ok and nick_ok and class_ok):
+                return
+            if not allow_promotion:
+                return
 
-        target_role_name = MEMBER_ROLE if track == "member" else VISITOR_ROLE
-        target_role = member_role if track == "member" else visitor_role
-        other_role  = visitor_role if track == "member" else member_role
+            target_role_name = MEMBER_ROLE if track == "member" else VISITOR_ROLE
+            target_role = member_role if track == "member" else visitor_role
+            other_role  = visitor_role if track == "member" else member_role
 
-        added_target = False
-        removed_newcomer = False
+            added_target = False
+            removed_newcomer = False
 
-        # Add target role if missing
-        if target_role and target_role not in member.roles:
-            try:
-                await member.add_roles(target_role, reason=f"Completed onboarding ({track})")
-                added_target = True
-            except Exception as e:
-                logging.error(f"[ERROR] add {target_role_name} to {member}: {e}")
+            # Per-role requests: `member` may predate the class role just assigned, so the
+            # role list is never rewritten wholesale from it.
+            # Add target role if missing
+            if target_role and target_role not in member.roles:
+                try:
+                    await member.add_roles(target_role, reason=f"Completed onboarding ({track})")
+                    added_target = True
+                except Exception as e:
+                    logging.error(f"[ERROR] add {target_role_name} to {member}: {e}")
+                    # Not promoted: leave `verified` unset so the next gate check retries
+                    audit("onboard_promote_failed", member, track=track, role=target_role_name, error=str(e))
+                    return
 
-        # Ensure the opposite track role is not lingering
-        if other_role and other_role in member.roles:
-            try:
-                await member.remove_roles(other_role, reason="Switching onboarding track")
-            except Exception as e:
-                logging.error(f"[ERROR] remove other track role from {member}: {e}")
+            # Ensure the opposite track role is not lingering
+            if other_role and other_role in member.roles:
+                try:
+                    await member.remove_roles(other_role, reason="Switching onboarding track")
+                except Exception as e:
+                    logging.error(f"[ERROR] remove other track role from {member}: {e}")
 
-        # Remove Newcomer if present
-        if newcomer_role and newcomer_role in member.roles:
-            try:
-                await member.remove_roles(newcomer_role, reason="Completed onboarding")
-                removed_newcomer = True
-            except Exception as e:
-                logging.error(f"[ERROR] remove Newcomer from {member}: {e}")
+            # Remove Newcomer if present
+            if newcomer_role and newcomer_role in member.roles:
+                try:
+                    await member.remove_roles(newcomer_role, reason="Completed onboarding")
+                    removed_newcomer = True
+                except Exception as e:
+                    logging.error(f"[ERROR] remove Newcomer from {member}: {e}")
 
-        # Persist verified flag
-        if not rec.get("verified"):
-            rec["verified"] = True
-            verified_users[uid] = rec
-            save_verified()
+            # Persist verified flag
+            if not rec.get("verified"):
+                rec["verified"] = True
+                verified_users[uid] = rec
+                mark_verified_dirty()
 
-        # Channel notice
-        onboarding_channel = discord.utils.get(guild.text_channels, name=ONBOARDING_CHANNEL)
-        if onboarding_channel and (added_target or removed_newcomer):
-            try:
-                await onboarding_channel.send(
-                    f"🎉 {member.mention} has completed onboarding and is now a **{target_role_name}**!"
-                )
-            except Exception:
-                pass
+            # Channel notice
+            onboarding_channel = get_text_channel(guild, ONBOARDING_CHANNEL)
+            if onboarding_channel and (added_target or removed_newcomer):
+                try:
+                    await onboarding_channel.send(
+                        f"🎉 {member.mention} has completed onboarding and is now a **{target_role_name}**!"
+                    )
+                except Exception:
+                    pass
 
-        # Audit
-        try:
+            # Audit
             audit(
                 "onboard_promoted",
                 member,
@@ -812,15 +1238,10 @@ async def check_verification(member: discord.Member) -> None:
                 verified=True,
                 roles=[r.name for r in member.roles]
             )
-        except Exception:
-            pass
 
     except Exception as e:
         logging.error(f"[ERROR] check_verification failed for {member}: {e}")
-        try:
-            audit("onboard_gate_error", member, error=str(e))
-        except Exception:
-            pass
+        audit("onboard_gate_error", member, error=str(e))
 
 
 # ---------- Prompt helpers ----------
@@ -830,9 +1251,9 @@ async def prompt_for_class_role(member: discord.Member):
         rec = verified_users.get(uid, {})
         if rec.get("class_assigned"):
             return
-        onboarding_channel = discord.utils.get(member.guild.text_channels, name=ONBOARDING_CHANNEL)
+        onboarding_channel = get_text_channel(member.guild, ONBOARDING_CHANNEL)
         if onboarding_channel:
-            has_class = any(discord.utils.get(member.roles, name=cls) for cls in CLASS_ROLES)
+            has_class = has_class_role(member)
             if not has_class:
                 v = View(timeout=None)
                 v.add_item(ClassRoleSelect())  # reuse the persistent select with the same custom_id
@@ -841,14 +1262,11 @@ async def prompt_for_class_role(member: discord.Member):
                     view=v
                 )
                 # Add custom emoji reactions by name if present in the guild
-                for key, mapped_class in CLASS_EMOJIS.items():
-                    if key.isalpha():
-                        emoji_obj = discord.utils.get(member.guild.emojis, name=key)
-                        if emoji_obj:
-                            try:
-                                await msg.add_reaction(emoji_obj)
-                            except Exception as e:
-                                logging.warning(f"[WARN] Could not add reaction for {key}: {e}")
+                for emoji_obj in get_class_emojis(member.guild):
+                    try:
+                        await msg.add_reaction(emoji_obj)
+                    except Exception as e:
+                        logging.warning(f"[WARN] Could not add reaction for {emoji_obj.name}: {e}")
     except Exception as e:
         logging.error(f"[ERROR] prompt_for_class_role: {e}")
 
@@ -856,6 +1274,65 @@ async def prompt_for_class_role(member: discord.Member):
 # =========================
 # REACTION HANDLER (robust)
 # =========================
+REACTION_CONCURRENCY = 8
+_reaction_slots = asyncio.Semaphore(REACTION_CONCURRENCY)
+
+# --- Per-user coalescing: one worker per user drains that user's latest pending reaction,
+# so a user spamming emojis holds at most one slot and only their final pick is applied.
+_pending_reactions: Dict[int, tuple] = {}
+_reaction_workers: Dict[int, asyncio.Task] = {}
+
+def queue_class_reaction(member: discord.Member, class_name: str, emoji_name, emoji_str,
+                         onboarding_channel: discord.TextChannel):
+    _pending_reactions[member.id] = (member, class_name, emoji_name, emoji_str, onboarding_channel)
+    if member.id not in _reaction_workers:
+        _reaction_workers[member.id] = asyncio.create_task(_drain_class_reactions(member.id))
+
+async def _drain_class_reactions(user_id: int):
+    try:
+        while True:
+            pending = _pending_reactions.pop(user_id, None)
+            if pending is None:
+                return
+            try:
+                # Bounded in-flight REST work across users; this worker is the user's only holder
+                async with _reaction_slots:
+                    await _handle_class_reaction(*pending)
+            except Exception as e:
+                logging.error(f"[ERROR] class reaction for {pending[0]} failed: {e}")
+                audit("reaction_handler_error", pending[0], error=str(e))
+    finally:
+        _reaction_workers.pop(user_id, None)
+
+async def _handle_class_reaction(member: discord.Member, class_name: str, emoji_name, emoji_str,
+                                 onboarding_channel: discord.TextChannel):
+    # Keep exactly one class role (also persists class_assigned)
+    removed = await _assign_class_role(member, class_name, "reaction")
+    if removed is None:
+        logging.warning(f"[CLASS-REACTION] Role '{class_name}' not found.")
+        try:
+            await member.send(f"⚠️ I couldn't find the '{class_name}' role. Please ping an officer.")
+        except Exception:
+            pass
+        return
+
+    # Log to channel and audit
+    await onboarding_channel.send(f"✅ {member.mention} assigned class role: **{class_name}**")
+
+    audit("class_assigned_via_reaction",
+          member,
+          assigned=class_name,
+          removed=removed,
+          emoji_name=emoji_name,
+          emoji_str=emoji_str)
+
+    # Now attempt final promotion (adds Guild Member, removes Newcomer, sets verified=True)
+    try:
+        await check_verification(member)
+    except Exception as e:
+        logging.error(f"[ERROR] check_verification after reaction for {member}: {e}")
+        audit("onboard_gate_post_class_error", member, error=str(e))
+
 @bot.event
 async def on_raw_reaction_add(payload):
     """
@@ -867,85 +1344,28 @@ async def on_raw_reaction_add(payload):
         if payload.member is None or payload.member.bot or payload.guild_id is None:
             return
 
-        guild = discord.utils.get(bot.guilds, id=payload.guild_id)
+        guild = bot.get_guild(payload.guild_id)
         if not guild:
             return
 
+        # Class prompts only live in the onboarding channel; drop every other reaction first
+        onboarding_channel = get_text_channel(guild, ONBOARDING_CHANNEL)
+        if onboarding_channel is None or payload.channel_id != onboarding_channel.id:
+            return
+
         # Resolve emoji in a robust way
         emoji_name = getattr(payload.emoji, "name", None)  # "Warrior" for <:Warrior:ID>
         emoji_str  = str(payload.emoji)                    # "<:Warrior:ID>" or "🗡️"
         class_name = CLASS_EMOJIS.get(emoji_name) or CLASS_EMOJIS.get(emoji_str)
         if not class_name:
-            # Not one of our class emojis—ignore
-            try:
-                audit("reaction_ignored", payload.member, emoji_name=emoji_name, emoji_str=emoji_str)
-            except Exception:
-                pass
-            return
-
-        member = guild.get_member(payload.user_id)
-        if not member or member.bot:
-            return
-
-        # Remove any existing class role to keep exactly one class
-        removed = []
-        for existing_class in CLASS_ROLES:
-            existing_role = discord.utils.get(guild.roles, name=existing_class)
-            if existing_role and existing_role in member.roles:
-                await member.remove_roles(existing_role)
-                removed.append(existing_class)
-
-        # Add the selected class role
-        role = discord.utils.get(guild.roles, name=class_name)
-        if not role:
-            logging.warning(f"[CLASS-REACTION] Role '{class_name}' not found.")
-            try:
-                await member.send(f"⚠️ I couldn't find the '{class_name}' role. Please ping an officer.")
-            except Exception:
-                pass
-            return
-
-        if role not in member.roles:
-            await member.add_roles(role)
+            return  # not one of our class emojis
 
-        # Persist class_assigned flag in DB
-        uid = str(member.id)
-        rec = verified_users.get(uid, {}) or {}
-        rec["class_assigned"] = True
-        verified_users[uid] = rec
-        save_verified()  # persist global verified_users
-
-        # Log to channel (optional) and audit
-        onboarding_channel = discord.utils.get(guild.text_channels, name=ONBOARDING_CHANNEL)
-        if onboarding_channel:
-            await onboarding_channel.send(f"✅ {member.mention} assigned class role: **{class_name}**")
-
-        try:
-            audit("class_assigned_via_reaction",
-                  member,
-                  assigned=class_name,
-                  removed=removed,
-                  emoji_name=emoji_name,
-                  emoji_str=emoji_str)
-        except Exception:
-            pass
-
-        # Now attempt final promotion (adds Guild Member, removes Newcomer, sets verified=True)
-        try:
-            await check_verification(member)
-        except Exception as e:
-            logging.error(f"[ERROR] check_verification after reaction for {member}: {e}")
-            try:
-                audit("onboard_gate_post_class_error", member, error=str(e))
-            except Exception:
-                pass
+        # Guild reaction events carry the member: no cache probe, no REST fallback needed
+        queue_class_reaction(payload.member, class_name, emoji_name, emoji_str, onboarding_channel)
 
     except Exception as e:
         logging.error(f"[ERROR] on_raw_reaction_add failed: {e}")
-        try:
-            audit("reaction_handler_error", None, error=str(e))
-        except Exception:
-            pass
+        audit("reaction_handler_error", None, error=str(e))
 
 
 
@@ -956,26 +1376,51 @@ async def on_raw_reaction_add(payload):
 async def on_ready():
     print(f"✅ Bot is online as {bot.user}")
 
+    # Register persistent views once per process (on_ready fires again on every reconnect)
+    if not getattr(bot, "_views_added", False):
+        try:
+            # Only the canonical verification view (includes ClassRoleSelect)
+            bot.add_view(VerificationView())
+            bot._views_added = True
+        except Exception as e:
+            logging.error(f"[ERROR] add persistent views: {e}")
+
+    # Start the write-behind flusher once per process
+    if not hasattr(bot, "_flush_task"):
+        bot._flush_task = asyncio.create_task(_flush_loop())
+
+    # Member reconciliation + mirror backfill run in the background so on_ready returns at once.
+    # A reconnect while a pass is still running must not start a second, overlapping one.
+    task = getattr(bot, "_startup_task", None)
+    if task is None or task.done():
+        bot._startup_task = asyncio.create_task(_startup_backfill())
+        bot._startup_task.add_done_callback(_log_startup_failure)
+
+def _log_startup_failure(task: asyncio.Task) -> None:
+    # Nothing awaits the startup task; surface its exception here instead of losing it
+    if not task.cancelled() and task.exception() is not None:
+        logging.error(f"[ERROR] startup backfill failed: {task.exception()!r}")
+
+async def _startup_backfill():
+    # Load Raid Mirror first so its listeners are live before the member scan
+    mirror_backfill = False
+    if not hasattr(bot, "_raid_mirror_loaded"):
+        bot._raid_mirror_loaded = True
+        await register_raid_mirror(bot)
+        print("Bot ready to mirror channels")
+        mirror_backfill = True
+
     # 🔁 Retro-verify any pre-existing Guild Members on startup
     for g in bot.guilds:
+        if not g.chunked:
+            await g.chunk(cache=True)  # one gateway request fills the member cache
         await retro_verify_existing_members(g)
 
-    # Register persistent views once per process
-    try:
-        # Only the canonical verification view (includes ClassRoleSelect)
-        bot.add_view(VerificationView())
-    except Exception as e:
-        logging.error(f"[ERROR] add persistent views: {e}")
-
-    # Load Raid Mirror and backfill
-    if not hasattr(bot, "_raid_mirror_loaded"):
-        await register_raid_mirror(bot)
-        bot._raid_mirror_loaded = True
-        print("Bot ready to mirror channels")
-        cog = bot.get_cog("CurrentWeekRaidMirror")
-        if cog:
-            for g in bot.guilds:
-                await cog.refresh_all_mirrors(g)
+    # Raid Mirror backfill (first ready only)
+    cog = bot.get_cog("CurrentWeekRaidMirror") if mirror_backfill else None
+    if cog:
+        for g in bot.guilds:
+            await cog.refresh_all_mirrors(g)
 
 
 @bot.command()
@@ -994,7 +1439,7 @@ async def onboardstatus(ctx, member: discord.Member = None):
         except Exception:
             legacy = {"rules": False, "nickname": False}
 
-        has_class = any(discord.utils.get(member.roles, name=cls) for cls in CLASS_ROLES)
+        has_class = has_class_role(member)
         await ctx.send(
             "Onboarding status for {}:\n"
             "- track: {}\n"
@@ -1027,22 +1472,16 @@ async def on_member_join(member):
         record = verified_users.get(str(member.id), {})
         if record.get("verified"):
             track = record.get("track", DEFAULT_TRACK)
-            member_role  = discord.utils.get(member.guild.roles, name=MEMBER_ROLE)
-            visitor_role = discord.utils.get(member.guild.roles, name=VISITOR_ROLE)
-            newcomer_role = discord.utils.get(member.guild.roles, name=NEWCOMER_ROLE)
+            member_role  = get_guild_role(member.guild, MEMBER_ROLE)
+            visitor_role = get_guild_role(member.guild, VISITOR_ROLE)
+            newcomer_role = get_guild_role(member.guild, NEWCOMER_ROLE)
 
             target_role = member_role if track == "member" else visitor_role
-            if target_role:
-                try:
-                    await member.add_roles(target_role)
-                except Exception as e:
-                    logging.error(f"[REJOIN] Failed adding {track} role to {member}: {e}")
-
-            if newcomer_role and newcomer_role in member.roles:
-                try:
-                    await member.remove_roles(newcomer_role, reason="Rejoin cleanup")
-                except Exception as e:
-                    logging.error(f"[REJOIN] Failed removing Newcomer from {member}: {e}")
+            try:
+                # Track role in + stray Newcomer out (removal still runs if the add fails)
+                await apply_role_changes(member, add=[target_role], remove=[newcomer_role], reason="Rejoin (verified)")
+            except Exception as e:
+                logging.error(f"[REJOIN] Failed restoring {track} roles for {member}: {e}")
 
             try:
                 await member.send("Welcome back! You're already verified.")
@@ -1052,16 +1491,16 @@ async def on_member_join(member):
             return
 
         # New user path (unchanged except note about duplicate sends below)
-        newcomer_role = discord.utils.get(member.guild.roles, name=NEWCOMER_ROLE)
+        newcomer_role = get_guild_role(member.guild, NEWCOMER_ROLE)
         newcomer_assigned = False
         if newcomer_role:
             await member.add_roles(newcomer_role)
             newcomer_assigned = True
 
-        channel = discord.utils.get(member.guild.text_channels, name=ONBOARDING_CHANNEL)
+        channel = get_text_channel(member.guild, ONBOARDING_CHANNEL)
         if channel:
-            # EITHER just this:
-            await send_onboarding_embed(member)
+            # EITHER just this (batched with other joins in the same burst):
+            queue_onboarding_embed(member)
             # (and remove the two lines below)
             # OR if you prefer a second message, remove send_onboarding_embed above.
             # await channel.send(f"{member.mention} Please follow the instructions above:", view=VerificationView())
@@ -1086,12 +1525,12 @@ async def on_member_remove(member):
 
         if user_id in verified_users:
             del verified_users[user_id]
-            save_verified(verified_users)
+            mark_verified_dirty()
             removed_verified = True
 
         if user_id in alts_data:
-            del alts_data[user_id]
-            save_alts(alts_data)
+            _unindex_alts(user_id, alts_data.pop(user_id).get("alts") or {})
+            mark_alts_dirty()
             removed_alts = True
 
         audit("member_remove", member, removed_verified=removed_verified, removed_alts=removed_alts)
@@ -1103,6 +1542,8 @@ async def on_member_remove(member):
 # =========================
 # ADMIN / UTILITY COMMANDS
 # =========================
+FIX_GATE_BATCH = 20  # members re-checked concurrently by !fixgate
+
 @bot.command(name="fixgate")
 @commands.has_permissions(manage_guild=True)
 async def fix_gate(ctx: commands.Context):
@@ -1119,55 +1560,51 @@ async def fix_gate(ctx: commands.Context):
         errors = 0
 
         # Optional: structured audit header
-        try:
-            audit("fixgate_begin", ctx.author, guild_id=guild.id, guild_name=guild.name)
-        except Exception:
-            pass
-
-        for m in guild.members:
-            try:
-                before_verified = verified_users.get(str(m.id), {}).get("verified", False)
-                before_roles = [r.name for r in m.roles]
-
-                await check_verification(m)
+        audit("fixgate_begin", ctx.author, guild_id=guild.id, guild_name=guild.name)
+
+        async def check_one(m):
+            before_verified = verified_users.get(str(m.id), {}).get("verified", False)
+            before = m.roles  # Role objects; names are only built for promoted members
+            await check_verification(m)
+            return before_verified, before
+
+        # Up to FIX_GATE_BATCH members are checked concurrently; per-user locks keep each one ordered
+        members = guild.members
+        for start in range(0, len(members), FIX_GATE_BATCH):
+            batch = members[start:start + FIX_GATE_BATCH]
+            results = await asyncio.gather(*(check_one(m) for m in batch), return_exceptions=True)
+            for m, res in zip(batch, results):
+                if isinstance(res, BaseException):
+                    errors += 1
+                    logging.error(f"[ERROR] fixgate failed for {m} ({m.id}): {res}")
+                    audit("fixgate_member_error", m, error=str(res))
+                    continue
 
+                before_verified, before = res
                 after_verified = verified_users.get(str(m.id), {}).get("verified", False)
-                after_roles = [r.name for r in m.roles]
 
                 if after_verified and not before_verified:
                     promoted_count += 1
+                    before_roles = [r.name for r in before]
+                    after_roles = [r.name for r in m.roles]
                     logging.info(f"[fixgate] PROMOTED {m} ({m.id}) — roles before={before_roles}, after={after_roles}")
-                    try:
-                        audit("fixgate_promoted", m, before_roles=before_roles, after_roles=after_roles)
-                    except Exception:
-                        pass
+                    audit("fixgate_promoted", m, before_roles=before_roles, after_roles=after_roles)
                 elif after_verified:
                     already_verified_count += 1
-                    logging.debug(f"[fixgate] ALREADY VERIFIED: {m} ({m.id}) — roles={after_roles}")
 
                 count += 1
-            except Exception as inner_e:
-                errors += 1
-                logging.error(f"[ERROR] fixgate failed for {m} ({m.id}): {inner_e}")
-                try:
-                    audit("fixgate_member_error", m, error=str(inner_e))
-                except Exception:
-                    pass
 
         # Summary logging
         logging.info(
             f"[fixgate] Completed. Total checked={count}, newly promoted={promoted_count}, "
             f"already verified={already_verified_count}, errors={errors}"
         )
-        try:
-            audit("fixgate_end",
-                  ctx.author,
-                  total_checked=count,
-                  newly_promoted=promoted_count,
-                  already_verified=already_verified_count,
-                  errors=errors)
-        except Exception:
-            pass
+        audit("fixgate_end",
+              ctx.author,
+              total_checked=count,
+              newly_promoted=promoted_count,
+              already_verified=already_verified_count,
+              errors=errors)
 
         await ctx.send(
             f"✅ Rechecked onboarding gate for {count} members.\n"
@@ -1177,10 +1614,7 @@ async def fix_gate(ctx: commands.Context):
         )
     except Exception as e:
         logging.error(f"[ERROR] fixgate: {e}")
-        try:
-            audit("fixgate_fatal", ctx.author, error=str(e))
-        except Exception:
-            pass
+        audit("fixgate_fatal", ctx.author, error=str(e))
         await ctx.send("❌ Failed to run gate fix; check logs.")
 
 @bot.command(name="debuggate")
@@ -1189,27 +1623,28 @@ async def debug_gate(ctx: commands.Context, member: discord.Member):
     """Show the gate flags and roles for a member."""
     uid = str(member.id)
     rec = verified_users.get(uid, {}) or {}
-    rules_ok = bool(rec.get("rules_accepted"))
-    nick_ok  = bool(rec.get("nickname_confirmed"))
-    class_ok = bool(rec.get("class_assigned")) or any(r.name in CLASS_ROLES for r in member.roles)
+    rules_ok, nick_ok, class_ok = gate_flags(member, rec)
     roles = ", ".join([r.name for r in member.roles]) or "(none)"
     await ctx.send(
         f"Gate for **{member.display_name}**:\n"
         f"- rules_accepted: {rules_ok}\n"
         f"- nickname_confirmed: {nick_ok}\n"
         f"- class_assigned flag: {rec.get('class_assigned', False)}\n"
-        f"- class role present: {any(r.name in CLASS_ROLES for r in member.roles)}\n"
+        f"- class role present: {has_class_role(member)}\n"
         f"- VERIFIED flag: {bool(rec.get('verified'))}\n"
         f"- ROLES: {roles}"
     )
 
 
+# Sort key for members with no joined_at; aware, so it compares with Discord's UTC timestamps
+_JOINED_AT_MAX = datetime.max.replace(tzinfo=timezone.utc)
+
 @bot.command(name="auditsnapshot")
 @commands.has_permissions(manage_guild=True)
 async def audit_snapshot(ctx: commands.Context, *args: str):
     """
     Write a point-in-time onboarding snapshot into guild_audit.log,
-    and print the info in the channel.
+    and post the totals in the channel with the per-member table as a CSV.
 
     Usage:
       !auditsnapshot
@@ -1220,19 +1655,6 @@ async def audit_snapshot(ctx: commands.Context, *args: str):
       !auditsnapshot --alpha
     """
     try:
-        # --- helper: safe audit() call (no-op if not present) ---
-        def _audit(event: str, member: discord.abc.User | None = None, **fields):
-            fn = globals().get("audit", None)
-            if callable(fn):
-                try:
-                    fn(event, member, **fields)
-                except Exception:
-                    pass
-
-        # --- emoji flag helper ---
-        def flag(ok: bool) -> str:
-            return "✅" if ok else "❌"
-
         # --- parse args: filter + sort mode ---
         filter_mode = None        # None (all), True (verified only), False (unverified only)
         sort_alpha  = False       # default chronological by joined_at
@@ -1246,8 +1668,8 @@ async def audit_snapshot(ctx: commands.Context, *args: str):
                 sort_alpha = True
 
         guild = ctx.guild
-        newcomer_role = discord.utils.get(guild.roles, name=NEWCOMER_ROLE)
-        member_role   = discord.utils.get(guild.roles, name=MEMBER_ROLE)
+        newcomer_role = get_guild_role(guild, NEWCOMER_ROLE)
+        member_role   = get_guild_role(guild, MEMBER_ROLE)
 
         # ------------------------------------------------------------
         # PREPASS: if a member ALREADY has Guild Member, ensure stored
@@ -1255,7 +1677,7 @@ async def audit_snapshot(ctx: commands.Context, *args: str):
         # ------------------------------------------------------------
         changed = 0
         for m in guild.members:
-            if member_role and (member_role in m.roles):
+            if has_role(m, member_role):
                 uid = str(m.id)
                 rec = verified_users.get(uid, {}) or {}
                 to_update = False
@@ -1270,83 +1692,41 @@ async def audit_snapshot(ctx: commands.Context, *args: str):
                 if to_update:
                     verified_users[uid] = rec
                     changed += 1
-                    try:
-                        _audit(
-                            "snapshot_autoset_flags",
-                            m,
-                            set_rules_accepted=True,
-                            set_nickname_confirmed=True,
-                            had_member_role=True
-                        )
-                    except Exception:
-                        pass
+                    audit(
+                        "snapshot_autoset_flags",
+                        m,
+                        set_rules_accepted=True,
+                        set_nickname_confirmed=True,
+                        had_member_role=True
+                    )
 
         if changed:
-            save_verified()  # persist the batch of fixes
+            mark_verified_dirty()  # persist the batch of fixes
 
         # ------------------------------------------------------------
-        # Build snapshot rows (now using the updated stored flags)
+        # Select and order the slice up front (stored flags are read
+        # AFTER the pre-fix); rows are then built, totalled and emitted
+        # in a single pass without an intermediate row list.
         # ------------------------------------------------------------
-        rows = []
-        for m in guild.members:
-            uid = str(m.id)
-            rec = verified_users.get(uid, {})
-
-            is_newcomer = (newcomer_role in m.roles) if newcomer_role else False
-            is_member   = (member_role in m.roles) if member_role else False
-
-            # Read stored flags AFTER pre-fix
-            rules_ok = bool(rec.get("rules_accepted"))
-            nick_ok  = bool(rec.get("nickname_confirmed"))
-
-            # Class: either the stored flag OR actually having a class role
-            has_class_role = any(r.name in CLASS_ROLES for r in m.roles)
-            class_ok = bool(rec.get("class_assigned")) or has_class_role
-
-            verified_flag = bool(rec.get("verified"))
-            gate_ready    = rules_ok and nick_ok and class_ok
-
-            rows.append({
-                "member": m,
-                "uid": uid,
-                "rules_ok": rules_ok,
-                "nick_ok": nick_ok,
-                "class_ok": class_ok,
-                "is_newcomer": is_newcomer,
-                "is_member": is_member,
-                "verified": verified_flag,
-                "gate_ready": gate_ready,
-                "joined_at": getattr(m, "joined_at", None),
-                "roles": [r.name for r in m.roles],
-            })
-
-        # Apply filter (slice)
-        if filter_mode is True:
-            rows = [r for r in rows if r["verified"]]
-        elif filter_mode is False:
-            rows = [r for r in rows if not r["verified"]]
-
-        # Sort rows: default chronological by joined_at (None at end), or alphabetically by display name
+        members = guild.members
+        if filter_mode is not None:
+            members = [
+                m for m in members
+                if bool(verified_users.get(str(m.id), {}).get("verified")) is filter_mode
+            ]
+
+        # Default chronological by joined_at (None at end), or alphabetically by display name
         if sort_alpha:
-            rows.sort(key=lambda r: (r["member"].display_name or "").lower())
+            members = sorted(members, key=lambda m: (m.display_name or "").lower())
         else:
-            from datetime import datetime as _dt
-            rows.sort(key=lambda r: (r["joined_at"] or _dt.max))
+            members = sorted(members, key=lambda m: (getattr(m, "joined_at", None) or _JOINED_AT_MAX))
 
-        # Totals for the selected slice
-        totals = {
-            "members_total": 0,
-            "newcomers": 0,
-            "guild_members": 0,
-            "verified_true": 0,
-            "gate_ready_not_promoted": 0,
-            "incomplete_rules": 0,
-            "incomplete_nickname": 0,
-            "incomplete_class": 0,
-        }
+        # Totals for the selected slice (plain local counters; collected into `totals` after the loop)
+        n_total = n_newcomers = n_guild_members = n_verified = 0
+        n_ready_not_promoted = n_no_rules = n_no_nick = n_no_class = 0
 
         # Start audit block
-        _audit(
+        audit(
             "snapshot_begin",
             None,
             guild_id=guild.id,
@@ -1357,45 +1737,46 @@ async def audit_snapshot(ctx: commands.Context, *args: str):
             prepass_autofixed=changed
         )
 
-        # Build channel output
+        # Per-member table goes out as one CSV attachment instead of many paged messages
         sort_label = "alphabetical" if sort_alpha else "chronological"
-        header = f"{'Member':<24} | {'Joined':<10} | Rules | Nick | Class | Verified | Newcomer | GuildMem | GateReady"
-        sep = "-" * len(header)
-        channel_lines = [f"[slice={('verified' if filter_mode is True else 'unverified' if filter_mode is False else 'all')}, sort={sort_label}, autofixed={changed}]", header, sep]
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        w.writerow(["User ID", "Display Name", "Joined", "Rules", "Nickname", "Class",
+                    "Verified", "Newcomer", "Guild Member", "Gate Ready"])
 
         # Emit per-member + accumulate totals
-        for r in rows:
-            m = r["member"]
-            rules_ok    = r["rules_ok"]
-            nick_ok     = r["nick_ok"]
-            class_ok    = r["class_ok"]
-            is_newcomer = r["is_newcomer"]
-            is_member   = r["is_member"]
-            verified_f  = r["verified"]
-            gate_ready  = r["gate_ready"]
-            joined_at   = r["joined_at"]
-
-            totals["members_total"] += 1
+        for m in members:
+            rec = verified_users.get(str(m.id), {})
+
+            is_newcomer = has_role(m, newcomer_role)
+            is_member   = has_role(m, member_role)
+
+            rules_ok, nick_ok, class_ok = gate_flags(m, rec)
+            verified_f = bool(rec.get("verified"))
+            gate_ready = rules_ok and nick_ok and class_ok
+            joined_at  = getattr(m, "joined_at", None)
+
+            n_total += 1
             if is_newcomer:
-                totals["newcomers"] += 1
+                n_newcomers += 1
             if is_member:
-                totals["guild_members"] += 1
+                n_guild_members += 1
             if verified_f:
-                totals["verified_true"] += 1
+                n_verified += 1
             if gate_ready and not is_member:
-                totals["gate_ready_not_promoted"] += 1
+                n_ready_not_promoted += 1
             if not rules_ok:
-                totals["incomplete_rules"] += 1
+                n_no_rules += 1
             if not nick_ok:
-                totals["incomplete_nickname"] += 1
+                n_no_nick += 1
             if not class_ok:
-                totals["incomplete_class"] += 1
+                n_no_class += 1
 
             # Log this member in the audit file
-            _audit(
+            audit(
                 "snapshot_member",
                 m,
-                roles=r["roles"],
+                roles=[role.name for role in m.roles],
                 rules_ok=rules_ok,
                 nickname_ok=nick_ok,
                 class_ok=class_ok,
@@ -1406,29 +1787,32 @@ async def audit_snapshot(ctx: commands.Context, *args: str):
                 joined_at=(joined_at.isoformat() if joined_at else None)
             )
 
-            # Channel row
-            joined_str = "-"
-            try:
-                if joined_at:
-                    joined_str = joined_at.strftime("%Y-%m-%d")
-            except Exception:
-                pass
+            # CSV row
+            w.writerow([
+                m.id, m.display_name, joined_at.date().isoformat() if joined_at else "",
+                rules_ok, nick_ok, class_ok, verified_f, is_newcomer, is_member, gate_ready,
+            ])
 
-            channel_lines.append(
-                f"{m.display_name:<24} | {joined_str:<10} | "
-                f"{flag(rules_ok)}   | {flag(nick_ok)}  | {flag(class_ok)}   | "
-                f"{flag(verified_f)}      | {flag(is_newcomer)}       | {flag(is_member)}     | {flag(gate_ready)}"
-            )
+        totals = {
+            "members_total": n_total,
+            "newcomers": n_newcomers,
+            "guild_members": n_guild_members,
+            "verified_true": n_verified,
+            "gate_ready_not_promoted": n_ready_not_promoted,
+            "incomplete_rules": n_no_rules,
+            "incomplete_nickname": n_no_nick,
+            "incomplete_class": n_no_class,
+        }
 
         # End audit block
-        _audit("snapshot_summary", None, **totals)
-        _audit("snapshot_end", None, guild_id=guild.id)
+        audit("snapshot_summary", None, **totals)
+        audit("snapshot_end", None, guild_id=guild.id)
 
         # Human-friendly slice label
         slice_label = "verified" if filter_mode is True else "unverified" if filter_mode is False else "all members"
 
-        # Send audit log confirmation + totals
-        await ctx.send(
+        # Send audit log confirmation + totals, with the table attached
+        summary = (
             "📘 Snapshot written to `guild_audit.log` "
             f"(slice: **{slice_label}**, sort: **{sort_label}**, autofixed: **{changed}**).\n"
             f"Total in slice: {totals['members_total']} | "
@@ -1439,28 +1823,23 @@ async def audit_snapshot(ctx: commands.Context, *args: str):
         )
 
         if totals["members_total"] == 0:
-            await ctx.send("ℹ️ No members matched the requested filter.")
+            await ctx.send(summary + "\nℹ️ No members matched the requested filter.")
             return
 
-        # Send detailed table in channel (chunk to respect Discord 2000 char limit)
-        detailed_output = "```\n" + "\n".join(channel_lines) + "\n```"
-        for i in range(0, len(detailed_output), 1990):
-            await ctx.send(detailed_output[i:i+1990])
+        data = io.BytesIO(buf.getvalue().encode("utf-8"))
+        await ctx.send(summary, file=discord.File(fp=data, filename=f"snapshot_{guild.id}.csv"))
 
     except Exception as e:
         logging.error(f"[ERROR] audit_snapshot failed: {e}")
-        fn = globals().get("audit", None)
-        if callable(fn):
-            try:
-                fn("snapshot_error", ctx.author, error=str(e))
-            except Exception:
-                pass
+        audit("snapshot_error", ctx.author, error=str(e))
         await ctx.send("❌ Failed to write audit snapshot. Check logs.")
 
 
 # =========================
 # STARTUP RECONCILIATION (track-aware)
 # =========================
+RETRO_VERIFY_BATCH = 25  # concurrent role updates per retro-verify batch
+
 async def retro_verify_existing_members(guild: discord.Guild) -> None:
     """
     Reconcile DB flags with actual roles at startup, honoring track:
@@ -1470,28 +1849,65 @@ async def retro_verify_existing_members(guild: discord.Guild) -> None:
       - Infer track from roles if missing.
     """
     try:
-        member_role  = discord.utils.get(guild.roles, name=MEMBER_ROLE)
-        visitor_role = discord.utils.get(guild.roles, name=VISITOR_ROLE)
-        newcomer_role = discord.utils.get(guild.roles, name=NEWCOMER_ROLE)
+        member_role  = get_guild_role(guild, MEMBER_ROLE)
+        visitor_role = get_guild_role(guild, VISITOR_ROLE)
+        newcomer_role = get_guild_role(guild, NEWCOMER_ROLE)
 
         if not member_role and not visitor_role:
             logging.warning(f"[RETROVERIFY] Missing one/both roles: '{MEMBER_ROLE}', '{VISITOR_ROLE}'")
 
+
         total_checked = 0
         total_updated_db = 0
         total_added_role = 0
         total_removed_newcomer = 0
 
+        # Role fixes for up to RETRO_VERIFY_BATCH members run concurrently instead of one by one.
+        # Add and remove are separate requests: a failed add doesn't skip the Newcomer removal.
+        async def fix_roles(m, add, remove, reason, event, audit_on_failure=False, **fields):
+            added = removed = 0
+            failed = False
+            if add:
+                try:
+                    await m.add_roles(*add, reason=reason)
+                    added = len(add)
+                except Exception as e:
+                    failed = True
+                    logging.error(f"[RETROVERIFY] add {[r.name for r in add]} ({m}): {e}")
+            if remove:
+                try:
+                    await m.remove_roles(*remove, reason=reason)
+                    removed = len(remove)
+                except Exception as e:
+                    failed = True
+                    logging.error(f"[RETROVERIFY] remove {[r.name for r in remove]} ({m}): {e}")
+            if not failed or audit_on_failure:
+                audit(event, m, roles=[r.name for r in m.roles], **fields)
+            return added, removed
+
+        pending = []
+
+        async def flush_pending():
+            nonlocal total_added_role, total_removed_newcomer
+            results = await asyncio.gather(*pending, return_exceptions=True)
+            pending.clear()
+            for res in results:
+                if isinstance(res, tuple):
+                    total_added_role += res[0]
+                    total_removed_newcomer += res[1]
+
         for m in guild.members:
             total_checked += 1
+            if total_checked % 100 == 0:
+                await asyncio.sleep(0)  # let the gateway breathe on large guilds
 
             uid = str(m.id)
             rec = verified_users.get(uid, {}) or {}
 
-            has_member   = member_role in m.roles if member_role else False
-            has_visitor  = visitor_role in m.roles if visitor_role else False
-            has_newcomer = newcomer_role in m.roles if newcomer_role else False
-            has_class    = any(r.name in CLASS_ROLES for r in m.roles)
+            has_member   = has_role(m, member_role)
+            has_visitor  = has_role(m, visitor_role)
+            has_newcomer = has_role(m, newcomer_role)
+            has_class    = has_class_role(m)
 
             # Infer track if missing
             track = rec.get("track")
@@ -1500,7 +1916,8 @@ async def retro_verify_existing_members(guild: discord.Guild) -> None:
                 rec["track"] = track
 
             target_role = member_role if track == "member" else visitor_role
-            has_target  = (target_role in m.roles) if target_role else False
+            has_target  = has_role(m, target_role)
+            drop_newcomer = [newcomer_role] if has_newcomer else []
 
             # A) Has target role but DB not verified -> mark verified and set flags
             if has_target and not rec.get("verified", False):
@@ -1510,68 +1927,42 @@ async def retro_verify_existing_members(guild: discord.Guild) -> None:
                 if has_class:
                     rec["class_assigned"] = True
                 verified_users[uid] = rec
-                save_verified()
+                mark_verified_dirty()
                 total_updated_db += 1
 
-                if has_newcomer and newcomer_role:
-                    try:
-                        await m.remove_roles(newcomer_role, reason="Retro-verify: already target role")
-                        total_removed_newcomer += 1
-                    except Exception as e:
-                        logging.error(f"[RETROVERIFY] remove newcomer: {e}")
-
-                try:
+                if drop_newcomer:
+                    pending.append(fix_roles(m, [], drop_newcomer, "Retro-verify: already target role",
+                                             "retro_verify_member", track=track, ensured_role=True))
+                else:
                     audit("retro_verify_member", m, track=track, ensured_role=True, roles=[r.name for r in m.roles])
-                except Exception:
-                    pass
-                continue
 
-            # B) DB says verified but missing target role -> add role
-            if rec.get("verified", False) and not has_target and target_role:
-                try:
-                    await m.add_roles(target_role, reason="Retro-verify: verified but missing target role")
-                    total_added_role += 1
-                except Exception as e:
-                    logging.error(f"[RETROVERIFY] add target role: {e}")
+            # B) DB says verified but missing target role -> add role (and drop Newcomer); audited even on failure
+            elif rec.get("verified", False) and not has_target and target_role:
+                pending.append(fix_roles(m, [target_role], drop_newcomer, "Retro-verify: verified but missing target role",
+                                         "retro_verify_promote_role", audit_on_failure=True,
+                                         track=track, ensured_role=True))
 
-                if has_newcomer and newcomer_role:
-                    try:
-                        await m.remove_roles(newcomer_role, reason="Retro-verify: verified user cleanup")
-                        total_removed_newcomer += 1
-                    except Exception as e:
-                        logging.error(f"[RETROVERIFY] remove newcomer: {e}")
+            # C) Clean up stray Newcomer for verified users
+            elif rec.get("verified", False) and drop_newcomer:
+                pending.append(fix_roles(m, [], drop_newcomer, "Retro-verify: cleanup for verified user",
+                                         "retro_verify_cleanup_newcomer", removed_newcomer=True))
 
-                try:
-                    audit("retro_verify_promote_role", m, track=track, ensured_role=True, roles=[r.name for r in m.roles])
-                except Exception:
-                    pass
-                continue
+            if len(pending) >= RETRO_VERIFY_BATCH:
+                await flush_pending()
 
-            # C) Clean up stray Newcomer for verified users
-            if rec.get("verified", False) and has_newcomer and newcomer_role:
-                try:
-                    await m.remove_roles(newcomer_role, reason="Retro-verify: cleanup for verified user")
-                    total_removed_newcomer += 1
-                    try:
-                        audit("retro_verify_cleanup_newcomer", m, removed_newcomer=True)
-                    except Exception:
-                        pass
-                except Exception as e:
-                    logging.error(f"[RETROVERIFY] Failed removing stray Newcomer from {m}: {e}")
+        if pending:
+            await flush_pending()
 
-        try:
-            audit(
-                "retro_verify_summary",
-                None,
-                guild_id=guild.id,
-                guild_name=guild.name,
-                total_checked=total_checked,
-                total_updated_db=total_updated_db,
-                total_added_role=total_added_role,
-                total_removed_newcomer=total_removed_newcomer
-            )
-        except Exception:
-            pass
+        audit(
+            "retro_verify_summary",
+            None,
+            guild_id=guild.id,
+            guild_name=guild.name,
+            total_checked=total_checked,
+            total_updated_db=total_updated_db,
+            total_added_role=total_added_role,
+            total_removed_newcomer=total_removed_newcomer
+        )
 
         logging.info(
             f"[RETROVERIFY] Guild '{guild.name}' ({guild.id}) "
@@ -1581,10 +1972,7 @@ async def retro_verify_existing_members(guild: discord.Guild) -> None:
 
     except Exception as e:
         logging.error(f"[RETROVERIFY] Error reconciling members in guild '{guild.name}': {e}")
-        try:
-            audit("retro_verify_error", None, guild_id=guild.id, error=str(e))
-        except Exception:
-            pass
+        audit("retro_verify_error", None, guild_id=guild.id, error=str(e))
 
 def is_admin_or_owner(ctx):
     return (
@@ -1731,19 +2119,20 @@ async def reassignalt(ctx, alt_name: str, member: discord.Member, alt_class: str
             await ctx.send("❌ You do not have permission to reassign alts.")
             return
         alt_class = alt_class.capitalize()
-        if alt_class not in CLASS_ROLES:
+        if alt_class not in CLASS_ROLES_SET:
             await ctx.send(f"❌ Invalid class `{alt_class}`. Choose from: {', '.join(CLASS_ROLES)}")
             return
-        for uid, record in alts_data.items():
-            existing = record.get("alts", {})
-            if isinstance(existing, dict) and alt_name in existing:
-                del record["alts"][alt_name]
+        for old_owner_id in alt_index.pop(alt_name, ()):
+            existing = alts_data.get(old_owner_id, {}).get("alts", {})
+            if isinstance(existing, dict):
+                existing.pop(alt_name, None)
         new_owner_id = str(member.id)
         alts_data[new_owner_id] = alts_data.get(new_owner_id, {})
         alts_data[new_owner_id].setdefault("alts", {})
         alts_data[new_owner_id]["alts"][alt_name] = alt_class
+        _index_alts(new_owner_id, (alt_name,))
         alts_data[new_owner_id]["main"] = member.display_name
-        save_alts()
+        mark_alts_dirty()
         await ctx.send(f"🔄 `{alt_name}` ({alt_class}) is now assigned as an alt to `{member.display_name}`.")
     except Exception as e:
         logging.error(f"[ERROR] reassignalt: {e}")
@@ -1755,109 +2144,97 @@ async def setmainfor(ctx, member: discord.Member, main_name: str, main_class: st
         if not is_admin_or_owner(ctx):
             await ctx.send("❌ You do not have permission to set another user's main.")
             return
+        if main_class:
+            main_class = main_class.capitalize()
+            if main_class not in CLASS_ROLES_SET:
+                await ctx.send(f"❌ Invalid class `{main_class}`. Choose from: {', '.join(CLASS_ROLES)}")
+                return
+        # Validate first, then mutate with no await in between: the update is atomic on the loop.
         user_id = str(member.id)
         alts_data[user_id] = alts_data.get(user_id, {})
         old_main = alts_data[user_id].get("main")
         alts_data[user_id]["main"] = main_name
         if main_class:
-            main_class = main_class.capitalize()
-            if main_class not in CLASS_ROLES:
-                await ctx.send(f"❌ Invalid class `{main_class}`. Choose from: {', '.join(CLASS_ROLES)}")
-                return
             alts_data[user_id]["class"] = main_class
         if old_main and old_main != main_name:
             alts_data[user_id].setdefault("alts", {})
             if old_main not in alts_data[user_id]["alts"]:
                 alts_data[user_id]["alts"][old_main] = "Unknown"
-        save_alts()
+                _index_alts(user_id, (old_main,))
+        mark_alts_dirty()
         await ctx.send(f"🛠 `{member.display_name}`'s main set to `{main_name}`" + (f" with class `{main_class}`." if main_class else "."))
     except Exception as e:
         logging.error(f"[ERROR] setmainfor: {e}")
         await ctx.send("❌ Error setting main.")
 
+CLASS_BAR_WIDTH = 20  # characters in the longest classstats bar
+
 @bot.command()
 async def classstats(ctx):
-    import asyncio
     try:
-        class_members = {cls: [] for cls in CLASS_ROLES}
-        all_members_combined = {cls: [] for cls in CLASS_ROLES}
-        is_alt_flags = {}
+        class_members = defaultdict(list)  # class -> display names ("(Alt)" suffixed)
+        mains_counter = Counter()
+        alts_counter = Counter()
+        seen_names = set()
 
-        # Build class/member maps from your alts_data
+        # Single pass over alts_data: names and mains/alts counts together
         for uid, record in alts_data.items():
             main_name = record.get("main")
             main_class = record.get("class")
-            if main_name and main_class in CLASS_ROLES:
+            if main_name and main_class in CLASS_ROLES_SET:
                 class_members[main_class].append(main_name)
-                all_members_combined[main_class].append(main_name)
-                is_alt_flags[main_name] = False
+                mains_counter[main_class] += 1
+                seen_names.add(main_name)
             for alt_name, alt_class in record.get("alts", {}).items():
-                if alt_class in CLASS_ROLES:
+                if alt_class in CLASS_ROLES_SET:
                     class_members[alt_class].append(f"{alt_name} (Alt)")
-                    all_members_combined[alt_class].append(alt_name)
-                    is_alt_flags[alt_name] = True
+                    alts_counter[alt_class] += 1
+                    seen_names.add(alt_name)
 
         # Add members that have class roles but aren't in alts_data
         for guild in bot.guilds:
+            class_names_by_id = _class_role_names_by_id(guild)
             for member in guild.members:
-                class_role = next((role.name for role in member.roles if role.name in CLASS_ROLES), None)
-                if class_role:
-                    if member.display_name not in is_alt_flags and member.display_name not in class_members[class_role]:
-                        class_members[class_role].append(member.display_name)
-                        all_members_combined[class_role].append(member.display_name)
-                        is_alt_flags[member.display_name] = False
-
-        if not any(class_members.values()):
+                class_role = _member_class_name(member, class_names_by_id)
+                if class_role and member.display_name not in seen_names:
+                    class_members[class_role].append(member.display_name)
+                    mains_counter[class_role] += 1
+                    seen_names.add(member.display_name)
+
+        if not class_members:
             await ctx.send("📊 No class roles assigned yet.")
             return
 
-        # Text summary (kept lightweight per message)
+        # Text summary (packed into as few messages as the 2000-char limit allows)
         summary_lines = ["**Vindicated's Class Composition**"]
         for cls in sorted(class_members):
             members = sorted(class_members[cls], key=lambda x: x.lower())
             if members:
                 summary_lines.append(f"\n**{cls}** ({len(members)}):\n" + ", ".join(members))
-        for part in summary_lines:
-            await ctx.send(part)
+        for chunk in split_message("\n".join(summary_lines)):
+            await ctx.send(chunk)
 
         # Bar chart data
-        labels = [cls for cls in CLASS_ROLES if len(all_members_combined[cls]) > 0]
-        mains_count = [len([m for m in all_members_combined[cls] if not is_alt_flags.get(m, False)]) for cls in labels]
-        alts_count  = [len([m for m in all_members_combined[cls] if     is_alt_flags.get(m, False)]) for cls in labels]
+        labels = [cls for cls in CLASS_ROLES if cls in class_members]
+        mains_count = [mains_counter[cls] for cls in labels]
+        alts_count  = [alts_counter[cls] for cls in labels]
 
         if not labels:
             return
 
-        # Helper that builds the PNG in a background thread
-        def _build_class_plot_png(labels, mains_count, alts_count):
-            import io
-            import matplotlib
-            matplotlib.use("Agg")  # headless backend
-            import matplotlib.pyplot as plt
-
-            x = range(len(labels))
-            plt.figure(figsize=(8, 6))
-            # Colors optional; keep if you like, or omit for defaults
-            plt.bar(x, mains_count, label='Mains', color='skyblue')
-            plt.bar(x, alts_count, bottom=mains_count, label='Alts', color='orange')
-            plt.title("Vindicated Full Class Composition (Mains + Alts)")
-            plt.xlabel("Class")
-            plt.ylabel("Count")
-            plt.xticks(ticks=x, labels=labels, rotation=45)
-            plt.legend()
-            plt.tight_layout()
-
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png')
-            buffer.seek(0)
-            plt.close()
-            return buffer
-
-        # Offload plotting + PNG save so we don't block the event loop/heartbeat
-        buffer = await asyncio.to_thread(_build_class_plot_png, labels, mains_count, alts_count)
-
-        file = File(fp=buffer, filename="full_class_composition.png")
-        await ctx.send(file=file)
+        # Text bar chart in an embed (no image rendering); raw counts attached as JSON
+        scale = CLASS_BAR_WIDTH / max(m + a for m, a in zip(mains_count, alts_count))
+        embed = discord.Embed(
+            title="Vindicated Full Class Composition (Mains + Alts)",
+            color=discord.Color.blue(),
+        )
+        for cls, mains, alts in zip(labels, mains_count, alts_count):
+            bar = "█" * round(mains * scale) + "░" * round(alts * scale)
+            embed.add_field(name=cls, value=f"`{bar or '·'}` {mains} mains + {alts} alts", inline=False)
+        embed.set_footer(text="█ mains  ░ alts")
+
+        data = io.BytesIO(_json_dumps({"labels": labels, "mains": mains_count, "alts": alts_count}))
+        await ctx.send(embed=embed, file=File(fp=data, filename="class_composition.json"))
 
     except Exception as e:
         logging.error(f"[ERROR] classstats: {e}", exc_info=True)
@@ -1875,7 +2252,7 @@ async def addalt(ctx, alt_name: str, *, alt_class: str = None):
             return
         user_id = str(ctx.author.id)
         alt_class = alt_class.strip().capitalize()
-        if alt_class not in CLASS_ROLES:
+        if alt_class not in CLASS_ROLES_SET:
             await ctx.send(f"Invalid class `{alt_class}`. Choose from: {', '.join(CLASS_ROLES)}")
             return
         record = alts_data.get(user_id, {})
@@ -1889,7 +2266,8 @@ async def addalt(ctx, alt_name: str, *, alt_class: str = None):
             return
         record["alts"][alt_name] = alt_class
         alts_data[user_id] = record
-        save_alts()
+        _index_alts(user_id, (alt_name,))
+        mark_alts_dirty()
         await ctx.send(f"Added alt `{alt_name}` with class `{alt_class}` to your account.")
     except Exception as e:
         logging.error(f"[ERROR] addalt: {e}")
@@ -1908,7 +2286,8 @@ async def removealt(ctx, alt_name: str):
             return
         del alts[alt_name]
         alts_data[user_id]["alts"] = alts
-        save_alts()
+        _unindex_alts(user_id, (alt_name,))
+        mark_alts_dirty()
         await ctx.send(f"🗑 Removed alt `{alt_name}` from your account.")
     except Exception as e:
         logging.error(f"[ERROR] removealt: {e}")
@@ -1917,11 +2296,15 @@ async def removealt(ctx, alt_name: str):
 @bot.command()
 async def whoismain(ctx, alt_name: str):
     try:
-        for main_id, record in alts_data.items():
-            if alt_name in record.get("alts", {}):
-                main = record.get("main", "Unknown")
-                await ctx.send(f"🧾 `{alt_name}` belongs to main: `{main}`")
-                return
+        record = next(
+            (alts_data[uid] for uid in alt_index.get(alt_name, ())
+             if uid in alts_data and alt_name in alts_data[uid].get("alts", {})),
+            None,
+        )
+        if record:
+            main = record.get("main", "Unknown")
+            await ctx.send(f"🧾 `{alt_name}` belongs to main: `{main}`")
+            return
         await ctx.send(f"❌ `{alt_name}` not found in alt records.")
     except Exception as e:
         logging.error(f"[ERROR] whoismain: {e}")
@@ -1931,15 +2314,22 @@ async def whoismain(ctx, alt_name: str):
 @commands.has_permissions(administrator=True)
 async def importalts(ctx):
     try:
-        with open('alts_import.csv', newline='') as f:
-            reader = csv.reader(f)
-            for row in reader:
-                main_name = row[0].strip()
-                alts = [alt.strip() for alt in row[1:] if alt.strip()]
-                main_member = discord.utils.get(ctx.guild.members, display_name=main_name)
-                if main_member:
-                    alts_data[str(main_member.id)] = {"main": main_name, "alts": {a: "Unknown" for a in alts}}
-        save_alts()
+        rows = await asyncio.to_thread(_read_csv_rows, 'alts_import.csv')
+        # display name -> member, built once (first match wins, like discord.utils.get)
+        by_display: Dict[str, discord.Member] = {}
+        for m in ctx.guild.members:
+            by_display.setdefault(m.display_name, m)
+        for row in rows:
+            main_name = row[0].strip()
+            alts = [alt.strip() for alt in row[1:] if alt.strip()]
+            main_member = by_display.get(main_name)
+            if main_member:
+                uid = str(main_member.id)
+                if uid in alts_data:
+                    _unindex_alts(uid, alts_data[uid].get("alts") or {})
+                alts_data[uid] = {"main": main_name, "alts": {a: "Unknown" for a in alts}}
+                _index_alts(uid, alts)
+        mark_alts_dirty()
         await ctx.send("📥 Alts imported successfully from alts_import.csv")
     except Exception as e:
         logging.error(f"[ERROR] importalts: {e}")
@@ -1949,7 +2339,7 @@ async def importalts(ctx):
 async def classstatus(ctx, member: discord.Member = None):
     try:
         member = member or ctx.author
-        assigned_class = next((role.name for role in member.roles if role.name in CLASS_ROLES), None)
+        assigned_class = next((role.name for role in member.roles if role.name in CLASS_ROLES_SET), None)
         if assigned_class:
             await ctx.send(f"📜 {member.display_name} has class role: **{assigned_class}**")
         else:
@@ -1962,14 +2352,17 @@ async def classstatus(ctx, member: discord.Member = None):
 @commands.has_permissions(administrator=True)
 async def exportclasses(ctx):
     try:
-        with open("class_roles_export.csv", "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["User ID", "Username", "Class Role"])
-            for guild in bot.guilds:
-                for member in guild.members:
-                    class_role = next((r.name for r in member.roles if r.name in CLASS_ROLES), None)
-                    if class_role:
-                        writer.writerow([member.id, member.name, class_role])
+        rows = []
+        for guild in bot.guilds:
+            class_names_by_id = _class_role_names_by_id(guild)
+            rows.extend(
+                [member.id, member.name, class_role]
+                for member in guild.members
+                if (class_role := _member_class_name(member, class_names_by_id))
+            )
+        await asyncio.to_thread(
+            _write_csv_rows, "class_roles_export.csv", ["User ID", "Username", "Class Role"], rows
+        )
         await ctx.send("📤 Exported class roles to `class_roles_export.csv`")
     except Exception as e:
         logging.error(f"[ERROR] exportclasses: {e}")
@@ -1987,6 +2380,12 @@ async def resetclass(ctx, member: discord.Member = None):
             remaining = int(RESET_COOLDOWN_SECONDS - (now - bot._reset_cooldowns[caller_id]))
             await ctx.send(f"⏱ Please wait {remaining} seconds before using this command again.")
             return
+        if len(bot._reset_cooldowns) >= 1024:
+            # Drop expired entries so the dict stays bounded by recent callers only
+            bot._reset_cooldowns = {
+                uid: ts for uid, ts in bot._reset_cooldowns.items()
+                if now - ts < RESET_COOLDOWN_SECONDS
+            }
         bot._reset_cooldowns[caller_id] = now
 
         if member is None:
@@ -1995,22 +2394,20 @@ async def resetclass(ctx, member: discord.Member = None):
             await ctx.send("❌ You don't have permission to reset others.")
             return
 
-        # Remove any class roles + reset persistent flag
-        for role_name in CLASS_ROLES:
-            role = discord.utils.get(member.guild.roles, name=role_name)
-            if role and role in member.roles:
-                try:
-                    await member.remove_roles(role)
-                except Exception as e:
-                    logging.error(f"[ERROR] remove role {role_name} from {member}: {e}")
+        # Remove any class roles (one pass over member.roles, one request per role) + reset persistent flag
+        for role in [r for r in member.roles if r.name in CLASS_ROLES_SET]:
+            try:
+                await member.remove_roles(role, reason="resetclass")
+            except Exception as e:
+                logging.error(f"[ERROR] remove role {role.name} from {member}: {e}")
 
         uid = str(member.id)
         rec = verified_users.get(uid, {})
         rec["class_assigned"] = False
         verified_users[uid] = rec
-        save_verified()
+        mark_verified_dirty()
 
-        onboarding_channel = discord.utils.get(ctx.guild.text_channels, name=ONBOARDING_CHANNEL)
+        onboarding_channel = get_text_channel(ctx.guild, ONBOARDING_CHANNEL)
         if onboarding_channel:
             await onboarding_channel.send(f"🔁 {member.mention}'s class role prompt has been reset by {ctx.author.mention}.")
         await prompt_for_class_role(member)
@@ -2022,12 +2419,12 @@ async def resetclass(ctx, member: discord.Member = None):
 @bot.command()
 async def count_raiders(ctx):
     try:
-        raider_role = discord.utils.get(ctx.guild.roles, name="Raider")
+        raider_role = get_guild_role(ctx.guild, "Raider")
         if not raider_role:
             await ctx.send("The 'Raider' role does not exist.")
             return
-        raiders = [member for member in ctx.guild.members if raider_role in member.roles]
-        await ctx.send(f"There are {len(raiders)} members with the Raider role.")
+        # Role.members checks each member's raw id list; no per-member Role lists are built
+        await ctx.send(f"There are {len(raider_role.members)} members with the Raider role.")
     except Exception as e:
         logging.error(f"[ERROR] count_raiders: {e}")
         await ctx.send("Failed to count Raider members.")
@@ -2035,12 +2432,11 @@ async def count_raiders(ctx):
 @bot.command()
 async def count_members(ctx):
     try:
-        member_role = discord.utils.get(ctx.guild.roles, name=MEMBER_ROLE)
+        member_role = get_guild_role(ctx.guild, MEMBER_ROLE)
         if not member_role:
             await ctx.send(f"The '{MEMBER_ROLE}' role does not exist.")
             return
-        members = [member for member in ctx.guild.members if member_role in member.roles]
-        await ctx.send(f"There are {len(members)} members with the {MEMBER_ROLE} role.")
+        await ctx.send(f"There are {len(member_role.members)} members with the {MEMBER_ROLE} role.")
     except Exception as e:
         logging.error(f"[ERROR] count_members: {e}")
         await ctx.send(f"Failed to count {MEMBER_ROLE} members.")
@@ -2048,11 +2444,11 @@ async def count_members(ctx):
 @bot.command()
 async def list_officers(ctx):
     try:
-        officer_role = discord.utils.get(ctx.guild.roles, name="Officer")
+        officer_role = get_guild_role(ctx.guild, "Officer")
         if not officer_role:
             await ctx.send("The 'Officer' role does not exist.")
             return
-        officers = [member.display_name for member in ctx.guild.members if officer_role in member.roles]
+        officers = [member.display_name for member in officer_role.members]
         if officers:
             officer_list = "\n".join(officers)
             await ctx.send(f"**Officer List:**\n{officer_list}")
@@ -2066,12 +2462,11 @@ async def list_officers(ctx):
 async def count_class(ctx, class_name: str):
     try:
         class_name = class_name.capitalize()
-        class_role = discord.utils.get(ctx.guild.roles, name=class_name)
+        class_role = get_guild_role(ctx.guild, class_name)
         if not class_role:
             await ctx.send(f"Class role '{class_name}' does not exist.")
             return
-        players = [member for member in ctx.guild.members if class_role in member.roles]
-        await ctx.send(f"There are {len(players)} members with the {class_name} class role.")
+        await ctx.send(f"There are {len(class_role.members)} members with the {class_name} class role.")
     except Exception as e:
         logging.error(f"[ERROR] count_class: {e}")
         await ctx.send("Failed to count class members.")
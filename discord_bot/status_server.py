@@ -1,8 +1,21 @@
-from flask import Flask, jsonify, render_template_string
+from flask import Flask, Response, request
+from jinja2 import BaseLoader, Environment, StrictUndefined
 import os
+import re
 import json
+import mmap
+import zlib
 from datetime import datetime
-from collections import deque
+
+try:
+    import orjson  # optional: faster encoding of the /api payload
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec  # optional: typed, low-allocation parse of leaver records
+except ImportError:
+    msgspec = None
 
 app = Flask(__name__)
 
@@ -19,16 +32,52 @@ LOG_FILES = [
 MAX_LOG_LINES = 3000  # for each file
 MAX_LEAVERS = 50      # number of recent leavers to display
 
+# "<timestamp> | <LEVEL> | {...member_remove...}" -> (timestamp, json payload)
+_LEAVER_RE = re.compile(
+    rb'^([^|\n]*) \| [^|\n]* \| ([^\n]*"event":"member_remove"[^\n]*?)\r?$',
+    re.MULTILINE,
+)
+
+
+# ---------------------------------------------------------------------
+# LEAVER RECORDS
+# ---------------------------------------------------------------------
+if msgspec is not None:
+    class LeaverRecord(msgspec.Struct):
+        """Fields of a member_remove audit line that the dashboard shows."""
+        user_id: int | None = None
+        display: str | None = None
+        user_name: str | None = None
+        removed_verified: bool = False
+        removed_alts: bool = False
+
+    _leaver_decoder = msgspec.json.Decoder(LeaverRecord)
+
+    def _decode_leaver(payload):
+        rec = _leaver_decoder.decode(payload)
+        return rec.user_id, rec.display, rec.user_name, rec.removed_verified, rec.removed_alts
+else:
+    def _decode_leaver(payload):
+        data = json.loads(payload)
+        return (
+            data.get("user_id"),
+            data.get("display"),
+            data.get("user_name"),
+            data.get("removed_verified", False),
+            data.get("removed_alts", False),
+        )
+
 
 # ---------------------------------------------------------------------
 # UTILITIES
 # ---------------------------------------------------------------------
-def tail(filepath, n=MAX_LOG_LINES):
-    """Return last n lines of a file efficiently."""
+def tail(filepath, n=MAX_LOG_LINES, size=None):
+    """Return last n lines of a file efficiently (size: known file size, if any)."""
     try:
         with open(filepath, "rb") as f:
-            f.seek(0, os.SEEK_END)
-            size = f.tell()
+            if size is None:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
             buffer = bytearray()
             lines_found = 0
             block_size = 1024
@@ -46,196 +95,264 @@ def tail(filepath, n=MAX_LOG_LINES):
         return []
 
 
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _log_signature():
+    """(name, mtime, size) per log file; changes whenever a log is written."""
+    sig = []
+    for fname in LOG_FILES:
+        try:
+            st = os.stat(os.path.join(LOG_DIR, fname))
+            sig.append((fname, st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append((fname, None, None))
+    return tuple(sig)
+
+
+_snapshot_cache = {"sig": None, "leavers": [], "logs": {}, "payload": b"", "etag": ""}
+
+
+def _snapshot():
+    """
+    Return leavers, logs and the encoded /api body, rebuilt only when one
+    of the log files has changed since the last request.
+    """
+    sig = _log_signature()
+    if _snapshot_cache["sig"] != sig:
+        leavers = parse_recent_leavers()
+        logs = get_logs()
+        payload = _dumps({"leavers": leavers, "logs": logs})
+        _snapshot_cache.update(
+            sig=sig,
+            leavers=leavers,
+            logs=logs,
+            payload=payload,
+            etag=f"{zlib.crc32(payload):08x}-{len(payload)}",
+        )
+    return _snapshot_cache
+
+
 def get_logs():
     """Return dictionary of recent lines per log file."""
     logs = {}
     for fname in LOG_FILES:
         path = os.path.join(LOG_DIR, fname)
-        logs[fname] = tail(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            logs[fname] = []
+            continue
+        if st.st_size == 0:
+            logs[fname] = []
+            continue
+        logs[fname] = tail(path, MAX_LOG_LINES, st.st_size)
     return logs
 
 
 def parse_recent_leavers():
     """Parse guild_audit.log for member_remove events (last MAX_LEAVERS)."""
     path = os.path.join(LOG_DIR, "guild_audit.log")
-    leavers = deque(maxlen=MAX_LEAVERS)
+    leavers = []
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            for line in reversed(f.readlines()):
-                if '"event":"member_remove"' in line:
-                    try:
-                        data = json.loads(line.split(" | ", 2)[-1])
-                        user = data.get("display") or data.get("user_name") or f"ID {data.get('user_id')}"
-                        removed_verified = data.get("removed_verified", False)
-                        removed_alts = data.get("removed_alts", False)
-                        ts = line.split(" | ")[0].strip()
-                        leavers.append({
-                            "user": user,
-                            "removed_verified": removed_verified,
-                            "removed_alts": removed_alts,
-                            "timestamp": ts
-                        })
-                        if len(leavers) >= MAX_LEAVERS:
-                            break
-                    except Exception:
-                        continue
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                matches = _LEAVER_RE.findall(mm)
+        # Newest first; malformed lines are skipped without shrinking the result
+        for ts, payload in reversed(matches):
+            if len(leavers) >= MAX_LEAVERS:
+                break
+            try:
+                user_id, display, user_name, removed_verified, removed_alts = _decode_leaver(payload)
+            except Exception:
+                continue
+            leavers.append({
+                "user": display or user_name or f"ID {user_id}",
+                "removed_verified": removed_verified,
+                "removed_alts": removed_alts,
+                "timestamp": ts.decode("utf-8", errors="ignore").strip()
+            })
     except FileNotFoundError:
         pass
     except Exception as e:
         print(f"Error parsing leavers: {e}")
-    return list(leavers)
+    return leavers
 
 
 # ---------------------------------------------------------------------
-# ROUTES
+# TEMPLATE
 # ---------------------------------------------------------------------
-@app.route("/")
-def index():
-    logs = get_logs()
-    leavers = parse_recent_leavers()
-
-    html = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8" />
-        <title>Guild Gatekeeper Dashboard</title>
-        <style>
-            body {
-                background-color: #0d1117;
-                color: #c9d1d9;
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                margin: 0;
-                padding: 0;
-            }
-            h1 {
-                text-align: center;
-                padding: 20px;
-                color: #58a6ff;
-            }
-            .container {
-                width: 90%;
-                margin: auto;
-                padding-bottom: 40px;
-            }
-            .card {
-                background: #161b22;
-                border: 1px solid #30363d;
-                border-radius: 10px;
-                margin: 20px 0;
-                padding: 20px;
-                box-shadow: 0 0 10px rgba(0,0,0,0.3);
-            }
-            .card h2 {
-                color: #58a6ff;
-                font-size: 20px;
-                margin-top: 0;
-            }
-            .toggle {
-                background-color: #238636;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 10px 16px;
-                cursor: pointer;
-                font-size: 14px;
-                transition: background-color 0.2s;
-            }
-            .toggle:hover {
-                background-color: #2ea043;
-            }
-            .hidden {
-                display: none;
-            }
-            pre {
-                background: #0d1117;
-                border-radius: 8px;
-                padding: 12px;
-                overflow-x: auto;
-                font-size: 13px;
-                max-height: 400px;
-            }
-            table {
-                width: 100%;
-                border-collapse: collapse;
-                margin-top: 10px;
-            }
-            th, td {
-                padding: 8px 10px;
-                border-bottom: 1px solid #30363d;
-                text-align: left;
-            }
-            th {
-                background-color: #21262d;
-                color: #58a6ff;
-            }
-            tr:hover {
-                background-color: #21262d;
-            }
-            .status-true {
-                color: #3fb950;
-                font-weight: bold;
-            }
-            .status-false {
-                color: #f85149;
-                font-weight: bold;
-            }
-        </style>
-        <script>
-            function toggleContent(id) {
-                const el = document.getElementById(id);
-                el.classList.toggle('hidden');
-            }
-        </script>
-    </head>
-    <body>
-        <h1>Guild Gatekeeper Dashboard</h1>
-        <div class="container">
-            
-            <div class="card">
-                <h2>📊 Recent Leavers</h2>
-                <button class="toggle" onclick="toggleContent('leavers')">Show / Hide Last {{ leavers|length }} Leavers</button>
-                <div id="leavers" class="hidden">
-                    {% if leavers %}
-                        <table>
-                            <tr><th>User</th><th>Removed Verified</th><th>Removed Alts</th><th>Timestamp</th></tr>
-                            {% for l in leavers %}
-                            <tr>
-                                <td>{{ l.user }}</td>
-                                <td class="{{ 'status-true' if l.removed_verified else 'status-false' }}">{{ l.removed_verified }}</td>
-                                <td class="{{ 'status-true' if l.removed_alts else 'status-false' }}">{{ l.removed_alts }}</td>
-                                <td>{{ l.timestamp }}</td>
-                            </tr>
-                            {% endfor %}
-                        </table>
-                    {% else %}
-                        <p>No recent leavers found.</p>
-                    {% endif %}
-                </div>
-            </div>
+HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8" />
+    <title>Guild Gatekeeper Dashboard</title>
+    <style>
+        body {
+            background-color: #0d1117;
+            color: #c9d1d9;
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            margin: 0;
+            padding: 0;
+        }
+        h1 {
+            text-align: center;
+            padding: 20px;
+            color: #58a6ff;
+        }
+        .container {
+            width: 90%;
+            margin: auto;
+            padding-bottom: 40px;
+        }
+        .card {
+            background: #161b22;
+            border: 1px solid #30363d;
+            border-radius: 10px;
+            margin: 20px 0;
+            padding: 20px;
+            box-shadow: 0 0 10px rgba(0,0,0,0.3);
+        }
+        .card h2 {
+            color: #58a6ff;
+            font-size: 20px;
+            margin-top: 0;
+        }
+        .toggle {
+            background-color: #238636;
+            color: white;
+            border: none;
+            border-radius: 8px;
+            padding: 10px 16px;
+            cursor: pointer;
+            font-size: 14px;
+            transition: background-color 0.2s;
+        }
+        .toggle:hover {
+            background-color: #2ea043;
+        }
+        .hidden {
+            display: none;
+        }
+        pre {
+            background: #0d1117;
+            border-radius: 8px;
+            padding: 12px;
+            overflow-x: auto;
+            font-size: 13px;
+            max-height: 400px;
+        }
+        table {
+            width: 100%;
+            border-collapse: collapse;
+            margin-top: 10px;
+        }
+        th, td {
+            padding: 8px 10px;
+            border-bottom: 1px solid #30363d;
+            text-align: left;
+        }
+        th {
+            background-color: #21262d;
+            color: #58a6ff;
+        }
+        tr:hover {
+            background-color: #21262d;
+        }
+        .status-true {
+            color: #3fb950;
+            font-weight: bold;
+        }
+        .status-false {
+            color: #f85149;
+            font-weight: bold;
+        }
+    </style>
+    <script>
+        function toggleContent(id) {
+            const el = document.getElementById(id);
+            el.classList.toggle('hidden');
+        }
+    </script>
+</head>
+<body>
+    <h1>Guild Gatekeeper Dashboard</h1>
+    <div class="container">
 
-            {% for name, lines in logs.items() %}
-            <div class="card">
-                <h2>📘 {{ name }}</h2>
-                <button class="toggle" onclick="toggleContent('{{ name|replace('.', '_') }}')">Show / Hide</button>
-                <pre id="{{ name|replace('.', '_') }}" class="hidden">{{ lines|join('\\n') }}</pre>
+        <div class="card">
+            <h2>📊 Recent Leavers</h2>
+            <button class="toggle" onclick="toggleContent('leavers')">Show / Hide Last {{ leavers|length }} Leavers</button>
+            <div id="leavers" class="hidden">
+                {% if leavers %}
+                    <table>
+                        <tr><th>User</th><th>Removed Verified</th><th>Removed Alts</th><th>Timestamp</th></tr>
+                        {% for l in leavers %}
+                        <tr>
+                            <td>{{ l.user }}</td>
+                            <td class="{{ 'status-true' if l.removed_verified else 'status-false' }}">{{ l.removed_verified }}</td>
+                            <td class="{{ 'status-true' if l.removed_alts else 'status-false' }}">{{ l.removed_alts }}</td>
+                            <td>{{ l.timestamp }}</td>
+                        </tr>
+                        {% endfor %}
+                    </table>
+                {% else %}
+                    <p>No recent leavers found.</p>
+                {% endif %}
             </div>
-            {% endfor %}
         </div>
-    </body>
-    </html>
-    """
 
-    return render_template_string(html, logs=logs, leavers=leavers)
+        {% for card in log_cards %}
+        <div class="card">
+            <h2>📘 {{ card.name }}</h2>
+            <button class="toggle" onclick="toggleContent('{{ card.dom_id }}')">Show / Hide</button>
+            <pre id="{{ card.dom_id }}" class="hidden">{{ card.text }}</pre>
+        </div>
+        {% endfor %}
+    </div>
+</body>
+</html>
+"""
+
+# Compiled once at import; no extensions, filters or reloading.
+_ENV = Environment(
+    loader=BaseLoader(),
+    autoescape=True,
+    auto_reload=False,
+    cache_size=8,
+    extensions=[],
+    undefined=StrictUndefined,
+    optimized=True,
+)
+_TEMPLATE = _ENV.from_string(HTML)
+
+
+# ---------------------------------------------------------------------
+# ROUTES
+# ---------------------------------------------------------------------
+@app.route("/")
+def index():
+    snap = _snapshot()
+    logs = snap["logs"]
+    leavers = snap["leavers"]
+    log_cards = [
+        {"name": name, "dom_id": name.replace(".", "_"), "text": "\n".join(lines)}
+        for name, lines in logs.items()
+    ]
+    return _TEMPLATE.render(log_cards=log_cards, leavers=leavers)
 
 
 @app.route("/api")
 def api():
-    """Return JSON of all current stats."""
-    return jsonify({
-        "leavers": parse_recent_leavers(),
-        "logs": get_logs()
-    })
+    """Return JSON of all current stats (304 if the client's ETag is current)."""
+    snap = _snapshot()
+    resp = Response(snap["payload"], mimetype="application/json")
+    resp.set_etag(snap["etag"])
+    return resp.make_conditional(request)
 
 
 # ---------------------------------------------------------------------